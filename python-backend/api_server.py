@@ -14,7 +14,10 @@ load_dotenv()
 
 from src.api.routes import create_app
 
-# Setup logging
+# Setup logging. The format uses neither thread nor process info, so skip
+# collecting them for every record.
+logging.logThreads = False
+logging.logProcesses = False
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(name)s: %(message)s",
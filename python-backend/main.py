@@ -43,6 +43,12 @@ def parse_args() -> argparse.Namespace:
         default=6,
         help="Max keyframes to extract from video files (default: 6).",
     )
+    parser.add_argument(
+        "--video-frame-mode",
+        choices=["evenly_spaced", "keyframes"],
+        default="evenly_spaced",
+        help="Sample video frames evenly, or use the I-frames (needs ffmpeg).",
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -123,6 +129,7 @@ async def main() -> None:
     log.info(f"  - Text input: {'<provided>' if args.text else '<none>'}")
     log.info(f"  - Model: {args.model or 'default (moonshotai/kimi-k2.5)'}")
     log.info(f"  - Max video frames: {args.max_video_frames}")
+    log.info(f"  - Video frame mode: {args.video_frame_mode}")
     log.info(f"  - Verbose logging: {args.verbose}")
     log.info(f"  - Debug mode: {args.debug}")
     log.info(f"  - Web search disabled: {args.no_web_search}")
@@ -139,6 +146,7 @@ async def main() -> None:
         text=args.text,
         model_name=args.model,
         max_video_frames=args.max_video_frames,
+        video_frame_mode=args.video_frame_mode,
         verbose=args.verbose,
         debug=args.debug,
         disable_web_search=args.no_web_search,
@@ -162,6 +170,7 @@ async def main() -> None:
         "text": args.text,
         "model": args.model or "moonshotai/kimi-k2.5",
         "max_video_frames": args.max_video_frames,
+        "video_frame_mode": args.video_frame_mode,
         "verbose": args.verbose,
         "debug": args.debug,
         "no_web_search": args.no_web_search,
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import functools
 import json
 import logging
 import os
+import threading
 import time
 from pathlib import Path
 
-from openai import OpenAI
+import orjson
+from openai import DefaultHttpxClient, OpenAI
 from pydantic import ValidationError
 
 from src.agent.debug import (
@@ -20,7 +24,7 @@ from src.agent.debug import (
 from src.agent.mock_tree import get_mock_vibe_tree
 from src.agent.prompts import ASSEMBLY_PROMPT, SYSTEM_PROMPT
 from src.models.song_tree import SongCharacteristics
-from src.preprocessing.video import extract_keyframes
+from src.preprocessing.video import KeyframeMode, extract_keyframes
 from src.services.ace_step_client import AceStepClient
 
 log = logging.getLogger(__name__)
@@ -35,13 +39,46 @@ AUDIO_EXTENSIONS = {".mp3", ".wav", ".ogg", ".flac", ".m4a", ".aac"}
 
 
 def _make_client() -> OpenAI:
-    """Create an OpenAI-compatible client pointing at OpenRouter."""
+    """Return the OpenAI-compatible client pointing at OpenRouter.
+
+    The client (and its keep-alive connection pool) is shared between calls
+    for as long as ``OPENROUTER_API_KEY`` is unchanged; when the key changes,
+    the previous client is closed.
+    """
+    global _current_client
+    with _client_lock:
+        client = _client_for_key(os.environ.get("OPENROUTER_API_KEY"))
+        if _current_client is not client:
+            if _current_client is not None:
+                _current_client.close()
+            _current_client = client
+    return client
+
+
+def close_client() -> None:
+    """Close the shared OpenRouter client; the next call builds a new one."""
+    global _current_client
+    with _client_lock:
+        if _current_client is not None:
+            _current_client.close()
+            _current_client = None
+        _client_for_key.cache_clear()
+
+
+@functools.lru_cache(maxsize=1)
+def _client_for_key(api_key: str | None) -> OpenAI:
+    # HTTP/2 lets concurrent jobs' completions share one OpenRouter connection
     return OpenAI(
         base_url=OPENROUTER_BASE_URL,
-        api_key=os.environ.get("OPENROUTER_API_KEY"),
+        api_key=api_key,
+        http_client=DefaultHttpxClient(http2=True),
     )
 
 
+_client_lock = threading.Lock()
+_current_client: OpenAI | None = None
+
+
 def _classify_file(path: Path) -> str:
     """Return 'image', 'audio', 'video', or 'unknown' based on extension."""
     ext = path.suffix.lower()
@@ -64,6 +101,7 @@ def prepare_content(
     text: str | None = None,
     max_video_frames: int = 6,
     audio_analyses: dict[str, dict] | None = None,
+    video_frame_mode: KeyframeMode = "evenly_spaced",
 ) -> list[dict]:
     """Convert raw file paths and text into a list of content dicts for the API.
 
@@ -76,6 +114,7 @@ def prepare_content(
         audio_analyses: Optional mapping of filename -> ACE-Step analysis result.
             If provided, audio files will include structured analysis instead of
             a useless placeholder.
+        video_frame_mode: How video frames are picked (see ``extract_keyframes``).
     """
     content: list[dict] = []
     audio_analyses = audio_analyses or {}
@@ -125,7 +164,9 @@ def prepare_content(
                 )
 
         elif kind == "video":
-            frames = extract_keyframes(path, max_frames=max_video_frames)
+            frames = extract_keyframes(
+                path, max_frames=max_video_frames, mode=video_frame_mode
+            )
             total = len(frames)
             for i, (frame_bytes, timestamp) in enumerate(frames):
                 # Add temporal annotation so the LLM understands chronological order
@@ -211,6 +252,23 @@ def _handle_tool_calls(
     return messages, has_tool_calls
 
 
+async def _analyze_audio(ace_client: AceStepClient, audio_path: Path) -> dict | None:
+    """Run ACE-Step audio understanding on one file; None if it fails."""
+    try:
+        analysis = await ace_client.understand_audio(audio_path)
+    except Exception as e:
+        log.warning("ACE-Step audio analysis failed for %s: %s", audio_path.name, e)
+        return None
+    log.info(
+        "Audio analysis for %s: caption='%s', bpm=%s, key=%s",
+        audio_path.name,
+        str(analysis.get("caption", ""))[:80],
+        analysis.get("bpm"),
+        analysis.get("key_scale"),
+    )
+    return analysis
+
+
 async def generate_music_prompt(
     file_paths: list[str | Path] | None = None,
     text: str | None = None,
@@ -221,6 +279,7 @@ async def generate_music_prompt(
     disable_web_search: bool = False,
     use_mock: bool = False,
     thinking_budget: int | None = None,
+    video_frame_mode: KeyframeMode = "evenly_spaced",
 ) -> SongCharacteristics:
     """Main entry point: analyze multimodal inputs and produce structured song characteristics.
 
@@ -234,6 +293,8 @@ async def generate_music_prompt(
         disable_web_search: If True, disable web search tool in the agent.
         use_mock: If True, return mock vibe tree data without calling the model.
         thinking_budget: Optional thinking token budget for models like Kimi K2.5 (default: None).
+        video_frame_mode: "evenly_spaced" (default) or "keyframes" to send only
+            the videos' I-frames.
 
     Returns:
         A tree-structured SongCharacteristics object ready for frontend editing and markdown conversion.
@@ -257,26 +318,24 @@ async def generate_music_prompt(
         ]
         if audio_files:
             log.info("Analyzing %d audio file(s) via ACE-Step...", len(audio_files))
-            ace_client = AceStepClient()
-            for audio_path in audio_files:
-                try:
-                    analysis = await ace_client.understand_audio(audio_path)
-                    audio_analyses[audio_path.name] = analysis
-                    log.info(
-                        "Audio analysis for %s: caption='%s', bpm=%s, key=%s",
-                        audio_path.name,
-                        str(analysis.get("caption", ""))[:80],
-                        analysis.get("bpm"),
-                        analysis.get("key_scale"),
-                    )
-                except Exception as e:
-                    log.warning(
-                        "ACE-Step audio analysis failed for %s: %s", audio_path.name, e
-                    )
+
+            # Files are analyzed concurrently; a failure only drops that file
+            async with AceStepClient() as ace_client, asyncio.TaskGroup() as tg:
+                tasks = {
+                    path.name: tg.create_task(_analyze_audio(ace_client, path))
+                    for path in audio_files
+                }
+            audio_analyses = {
+                name: task.result()
+                for name, task in tasks.items()
+                if task.result() is not None
+            }
 
     # Step 2: Prepare inputs
     step_start = time.time()
-    content = prepare_content(file_paths, text, max_video_frames, audio_analyses)
+    content = prepare_content(
+        file_paths, text, max_video_frames, audio_analyses, video_frame_mode
+    )
     step_duration = time.time() - step_start
     log.info("Prepared %d content blocks in %.2fs", len(content), step_duration)
 
@@ -344,18 +403,23 @@ async def generate_music_prompt(
             if json_start >= 0 and json_end > json_start:
                 json_str = final_content[json_start:json_end]
                 log.info("Extracted JSON: %s", json_str[:500])  # Log first 500 chars
-                data = json.loads(json_str)
+                data = orjson.loads(json_str)
+                preview = orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2)
                 log.info(
-                    "Parsed JSON data: %s",
-                    json.dumps(data, indent=2, default=str)[:1000],
+                    "Parsed JSON data: %s", preview[:1000].decode(errors="ignore")
                 )
                 result = SongCharacteristics(**data)
-                log.info("Created SongCharacteristics: %s", result.model_dump())
+                # The tree itself was just logged above; don't dump it again
+                log.info(
+                    "Created SongCharacteristics: root=%r with %d children",
+                    result.root.name,
+                    len(result.root.children),
+                )
             else:
                 raise ValueError("No JSON found in response")
         else:
             raise ValueError("Expected string response from model")
-    except (json.JSONDecodeError, ValidationError) as e:
+    except (orjson.JSONDecodeError, ValidationError) as e:
         log.error("Failed to parse response: %s", e)
         log.error("Full response content: %s", final_content)
         raise ValueError(
@@ -409,7 +473,9 @@ async def assemble_music_prompt(
 
     try:
         client = _make_client()
-        response = client.chat.completions.create(
+        # The OpenAI SDK call is blocking; keep it off the caller's event loop
+        response = await asyncio.to_thread(
+            client.chat.completions.create,
             model=model,
             messages=messages,
             temperature=0.5,
@@ -424,7 +490,7 @@ async def assemble_music_prompt(
         if json_start < 0 or json_end <= json_start:
             raise ValueError("No JSON found in assembly response")
 
-        parsed = json.loads(raw[json_start:json_end])
+        parsed = orjson.loads(raw[json_start:json_end])
         caption = parsed.get("caption", "").strip()
         lyrics = parsed.get("lyrics", "[Instrumental]").strip()
 
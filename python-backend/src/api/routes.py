@@ -3,34 +3,104 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import hashlib
 import logging
 import os
 import shutil
+import time
 import uuid
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
-from typing import Optional
-
-from fastapi import FastAPI, UploadFile, File, Form, BackgroundTasks, HTTPException
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Optional
+
+import aiofiles
+import orjson
+from fastapi import (
+    BackgroundTasks,
+    Depends,
+    FastAPI,
+    UploadFile,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from pydantic import BaseModel
 
-from src.agent.music_agent import generate_music_prompt, assemble_music_prompt
+from src.agent.music_agent import (
+    assemble_music_prompt,
+    close_client,
+    generate_music_prompt,
+)
+from src.preprocessing.video import KeyframeMode
 from src.services.ace_step_client import (
     AceStepClient,
     vibe_tree_to_ace_step_params,
 )
+from src.services.job_store import COMPLETED, FAILED, create_job_store
 
 log = logging.getLogger(__name__)
 
-# Simple in-memory job storage (use Redis/DB for production)
-jobs: dict[str, dict] = {}
+# Job status store — in-memory with TTL, or Redis when REDIS_URL is set
+jobs = create_job_store()
 
 # Create temporary directory for uploads
 TEMP_DIR = Path("/tmp/hacknation_uploads")
 TEMP_DIR.mkdir(parents=True, exist_ok=True)
 
+# Content-addressed store for uploaded reference audio, shared across jobs
+REFS_DIR = TEMP_DIR / "refs"
+REFS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Memoized ACE-Step outputs keyed by a hash of the generation inputs
+ACE_CACHE_DIR = TEMP_DIR / "ace_cache"
+ACE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+ACE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# How often the janitor sweeps stale job directories out of TEMP_DIR
+JANITOR_INTERVAL_SECONDS = 60
+
+# How long generated audio stays downloadable after it was written. Kept
+# separate from the job TTL because the UI history links to /api/audio/<id>
+# long after the job's status has expired (default: 7 days).
+AUDIO_RETENTION_SECONDS = int(
+    os.getenv("AUDIO_RETENTION_SECONDS", str(7 * 24 * 3600))
+)
+
+
+def _parse_thinking_budget() -> int | None:
+    """Read the optional THINKING_BUDGET override (tokens) from the environment."""
+    value = os.getenv("THINKING_BUDGET")
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        log.warning("Invalid THINKING_BUDGET env var, using default")
+        return None
+
+
+# Kimi thinking budget for tree generation, read once at startup
+THINKING_BUDGET = _parse_thinking_budget()
+
+# Cap on background jobs running at once, so a burst of requests cannot
+# flood the LLM / ACE-Step backends
+MAX_CONCURRENT_GENERATIONS = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "4"))
+_generation_slots = asyncio.Semaphore(MAX_CONCURRENT_GENERATIONS)
+
+# Largest single upload accepted, in bytes (default: 500 MiB)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+
+# Cap on uploads of a single request being written to disk at once
+_upload_slots = asyncio.Semaphore(8)
+
+# Strong references to in-flight job tasks (the event loop only keeps weak ones)
+_background_jobs: set[asyncio.Task] = set()
+
 
 class JobStatus(BaseModel):
     job_id: str
@@ -39,12 +109,99 @@ class JobStatus(BaseModel):
     error: Optional[str] = None
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Own the process-wide ACE-Step client and the temp-dir janitor."""
+    app.state.ace = AceStepClient()
+    janitor = asyncio.create_task(_tempdir_janitor())
+    try:
+        yield
+    finally:
+        # Stop the janitor and in-flight jobs before closing what they use
+        tasks = [janitor, *_background_jobs]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        await app.state.ace.aclose()
+        await jobs.aclose()
+        close_client()
+
+
+async def _tempdir_janitor() -> None:
+    """Periodically delete uploads and outputs that have expired."""
+    while True:
+        try:
+            await asyncio.to_thread(_sweep_temp_dir)
+        except Exception:
+            log.exception("Temp dir sweep failed")
+        await asyncio.sleep(JANITOR_INTERVAL_SECONDS)
+
+
+def _sweep_temp_dir() -> None:
+    """Remove job inputs and refs idle for longer than the job TTL, generated
+    audio older than ``AUDIO_RETENTION_SECONDS``, and expired ACE cache
+    entries. Age is judged by mtime."""
+    now = time.time()
+    job_cutoff = now - jobs.ttl_seconds
+    audio_cutoff = now - AUDIO_RETENTION_SECONDS
+    for entry in TEMP_DIR.iterdir():
+        if entry == REFS_DIR or entry == ACE_CACHE_DIR:
+            continue
+        if entry.is_dir():
+            _sweep_job_dir(entry, job_cutoff, audio_cutoff)
+        else:
+            _remove_if_older(entry, job_cutoff)
+    for entry in REFS_DIR.iterdir():
+        _remove_if_older(entry, job_cutoff)
+    for entry in ACE_CACHE_DIR.iterdir():
+        _remove_if_older(entry, now - ACE_CACHE_TTL_SECONDS)
+
+
+def _sweep_job_dir(job_dir: Path, job_cutoff: float, audio_cutoff: float) -> None:
+    """Expire the contents of one job directory.
+
+    Inputs go with the job TTL, but ``output.mp3`` is kept until
+    ``audio_cutoff``. The directory itself is removed once empty, unless it
+    was touched since ``job_cutoff`` (a request may be about to fill it).
+    """
+    try:
+        stale = job_dir.stat().st_mtime < job_cutoff
+        for entry in job_dir.iterdir():
+            cutoff = audio_cutoff if entry.name == "output.mp3" else job_cutoff
+            _remove_if_older(entry, cutoff)
+        if stale:
+            job_dir.rmdir()
+    except OSError:
+        pass  # gone already, or still holds audio
+
+
+def _remove_if_older(path: Path, cutoff: float) -> None:
+    """Delete ``path`` (file or directory) if it was last modified before ``cutoff``."""
+    try:
+        if path.stat().st_mtime >= cutoff:
+            return
+        if path.is_dir():
+            _remove_dir(path)
+        else:
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def get_ace_client(request: Request) -> AceStepClient:
+    """Dependency returning the shared ACE-Step client."""
+    return request.app.state.ace
+
+
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
     app = FastAPI(
         title="HackNation Music Generation API",
         description="REST API for multimodal memory to music agentic pipeline",
         version="0.1.0",
+        lifespan=_lifespan,
     )
 
     # Add CORS middleware
@@ -61,10 +218,10 @@ def create_app() -> FastAPI:
         text: Optional[str] = Form(None),
         model_name: Optional[str] = Form(None),
         max_video_frames: int = Form(6),
+        video_frame_mode: KeyframeMode = Form("evenly_spaced"),
         disable_web_search: bool = Form(False),
         use_mock: bool = Form(False),
         files: list[UploadFile] = File(default=[]),
-        background_tasks: BackgroundTasks = BackgroundTasks(),
     ) -> dict:
         """
         Generate a vibe tree from multimodal inputs.
@@ -76,9 +233,10 @@ def create_app() -> FastAPI:
             text: Optional text description/prompt
             model_name: Optional OpenRouter model ID
             max_video_frames: Max keyframes to extract from videos
+            video_frame_mode: "evenly_spaced" (default), or "keyframes" to use
+                the videos' I-frames
             disable_web_search: Whether to disable web search
             files: List of uploaded files (images, audio, video)
-            background_tasks: FastAPI background tasks
 
         Returns:
             Job ID and initial status
@@ -96,29 +254,37 @@ def create_app() -> FastAPI:
         job_dir = TEMP_DIR / job_id
         job_dir.mkdir(parents=True, exist_ok=True)
 
-        # Save uploaded files
-        file_paths = []
+        # Save uploaded files concurrently, each to its own destination
+        uploads = [f for f in files if f.filename]
         try:
-            for file in files:
-                if file.filename:
-                    file_path = job_dir / file.filename
-                    with open(file_path, "wb") as f:
-                        f.write(await file.read())
-                    file_paths.append(str(file_path))
+            names = _unique_names(
+                [_safe_filename(f.filename, "upload") for f in uploads]
+            )
+            file_paths = list(
+                await asyncio.gather(
+                    *(
+                        _persist_upload(f, job_dir / name)
+                        for f, name in zip(uploads, names)
+                    )
+                )
+            )
+        except HTTPException:
+            await asyncio.get_running_loop().run_in_executor(
+                None, _remove_dir, job_dir
+            )
+            raise
         except Exception as e:
-            log.error(f"Error saving uploaded files: {e}")
-            shutil.rmtree(job_dir, ignore_errors=True)
+            log.error("Error saving uploaded files: %s", e)
+            await asyncio.get_running_loop().run_in_executor(
+                None, _remove_dir, job_dir
+            )
             raise HTTPException(status_code=400, detail="Failed to save uploaded files")
 
         # Initialize job status
-        jobs[job_id] = {
-            "status": "processing",
-            "result": None,
-            "error": None,
-        }
+        await jobs.start(job_id)
 
         # Start generation in background
-        background_tasks.add_task(
+        _spawn_job(
             _run_generation,
             job_id,
             file_paths,
@@ -127,41 +293,75 @@ def create_app() -> FastAPI:
             max_video_frames,
             disable_web_search,
             use_mock,
+            video_frame_mode,
         )
 
         return {"job_id": job_id, "status": "processing"}
 
-    @app.get("/api/status/{job_id}")
-    async def get_status(job_id: str) -> JobStatus:
-        """Get the status and result of a generation job."""
-        if job_id not in jobs:
+    @app.get("/api/status/{job_id}", response_model=JobStatus)
+    async def get_status(job_id: str) -> Response:
+        """Get the status and result of a generation job.
+
+        The stored job is serialized straight to JSON by pydantic-core without
+        re-validating the (possibly large) result tree.
+        """
+        job = await jobs.get(job_id)
+        if job is None:
             raise HTTPException(status_code=404, detail="Job not found")
 
-        job = jobs[job_id]
-        return JobStatus(
-            job_id=job_id,
-            status=job["status"],
-            result=job.get("result"),
-            error=job.get("error"),
+        return Response(
+            content=_job_status_json(job_id, job), media_type="application/json"
         )
 
+    @app.websocket("/api/ws/status/{job_id}")
+    async def watch_status(websocket: WebSocket, job_id: str) -> None:
+        """Push job status to the client each time it changes.
+
+        Sends the same payload as ``/api/status/{job_id}``: once on connect,
+        then on every transition. The socket is closed after the job
+        completes or fails (code 4404 if the job does not exist).
+
+        The socket is also read while waiting, so a client that goes away
+        releases its store watcher at once rather than at the next update.
+        """
+        await websocket.accept()
+        pusher = asyncio.create_task(_push_status(websocket, job_id))
+        listener = asyncio.create_task(_wait_for_disconnect(websocket))
+        try:
+            await asyncio.wait(
+                (pusher, listener), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for task in (pusher, listener):
+                task.cancel()
+                # A disconnect or failed send just ends the stream
+                with suppress(
+                    asyncio.CancelledError, WebSocketDisconnect, RuntimeError, OSError
+                ):
+                    await task
+
     @app.post("/api/generate-music")
     async def generate_music(
-        vibe_tree: str = Form(...),
+        vibe_tree: UploadFile | str = File(...),
         audio_duration: float = Form(30),
         reference_audio: Optional[UploadFile] = File(None),
-        background_tasks: BackgroundTasks = BackgroundTasks(),
+        use_cache: bool = Form(True),
+        client: AceStepClient = Depends(get_ace_client),
     ) -> dict:
         """Generate music from a VibeTree via ACE-Step.
 
         Args:
-            vibe_tree: JSON string of the VibeTree
+            vibe_tree: The VibeTree as a JSON file part (``application/json``),
+                or as a plain JSON string field
             audio_duration: Duration of the generated audio in seconds (default: 30)
             reference_audio: Optional audio file for style transfer
+            use_cache: Reuse audio previously generated from identical inputs.
+                Pass False to force a fresh generation.
         """
+        raw_tree = vibe_tree if isinstance(vibe_tree, str) else await vibe_tree.read()
         try:
-            tree_dict = json.loads(vibe_tree)
-        except json.JSONDecodeError as e:
+            tree_dict = orjson.loads(raw_tree)
+        except orjson.JSONDecodeError as e:
             raise HTTPException(status_code=400, detail=f"Invalid vibe_tree JSON: {e}")
 
         job_id = str(uuid.uuid4())
@@ -170,16 +370,29 @@ def create_app() -> FastAPI:
 
         # Save reference audio if provided
         ref_audio_path: str | None = None
+        ref_audio_hash: str | None = None
         if reference_audio and reference_audio.filename:
-            ref_path = job_dir / reference_audio.filename
-            with open(ref_path, "wb") as f:
-                f.write(await reference_audio.read())
+            ref_path, ref_audio_hash = await _save_reference_audio(
+                reference_audio, job_dir
+            )
             ref_audio_path = str(ref_path)
 
-        jobs[job_id] = {"status": "processing", "result": None, "error": None}
+        cache_key = (
+            _music_cache_key(tree_dict, ref_audio_hash, audio_duration)
+            if use_cache
+            else None
+        )
+
+        await jobs.start(job_id)
 
-        background_tasks.add_task(
-            _run_music_generation, job_id, tree_dict, ref_audio_path, audio_duration
+        _spawn_job(
+            _run_music_generation,
+            job_id,
+            client,
+            tree_dict,
+            ref_audio_path,
+            audio_duration,
+            cache_key,
         )
 
         return {"job_id": job_id, "status": "processing"}
@@ -210,16 +423,18 @@ def create_app() -> FastAPI:
     # ── ACE-Step proxy endpoints ─────────────────────────
 
     @app.get("/api/ace-step/health")
-    async def ace_step_health() -> dict:
+    async def ace_step_health(
+        client: AceStepClient = Depends(get_ace_client),
+    ) -> dict:
         """Check if the remote ACE-Step API is reachable."""
-        client = AceStepClient()
         ok = await client.health_check()
         return {"ace_step_available": ok}
 
     @app.get("/api/ace-step/stats")
-    async def ace_step_stats() -> dict:
+    async def ace_step_stats(
+        client: AceStepClient = Depends(get_ace_client),
+    ) -> dict:
         """Get ACE-Step server statistics (queue size, job counts)."""
-        client = AceStepClient()
         try:
             stats = await client.server_stats()
             return {"status": "ok", "data": stats}
@@ -227,9 +442,10 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=502, detail=f"ACE-Step stats failed: {e}")
 
     @app.get("/api/ace-step/models")
-    async def ace_step_models() -> dict:
+    async def ace_step_models(
+        client: AceStepClient = Depends(get_ace_client),
+    ) -> dict:
         """List available DiT models on the ACE-Step server."""
-        client = AceStepClient()
         try:
             models = await client.list_models()
             return {"status": "ok", "data": models}
@@ -241,10 +457,10 @@ def create_app() -> FastAPI:
         query: str = Form(...),
         instrumental: bool = Form(False),
         temperature: float = Form(0.85),
+        client: AceStepClient = Depends(get_ace_client),
     ) -> dict:
         """Generate a song blueprint (caption, lyrics, metadata) from text description.
         No audio is produced."""
-        client = AceStepClient()
         try:
             result = await client.inspire(
                 query=query, instrumental=instrumental, temperature=temperature
@@ -255,25 +471,28 @@ def create_app() -> FastAPI:
 
     @app.post("/api/ace-step/understand")
     async def ace_step_understand(
+        background_tasks: BackgroundTasks,
         audio: UploadFile = File(...),
         temperature: float = Form(0.3),
+        client: AceStepClient = Depends(get_ace_client),
     ) -> dict:
         """Analyze an uploaded audio file to extract caption, BPM, key, lyrics, duration."""
         job_dir = TEMP_DIR / str(uuid.uuid4())
         job_dir.mkdir(parents=True, exist_ok=True)
-        audio_path = job_dir / (audio.filename or "upload.mp3")
+        audio_path = job_dir / _safe_filename(audio.filename, "upload.mp3")
+        # Delete the upload once the response is sent; on error paths the
+        # response never carries this task, so the janitor reclaims job_dir.
+        background_tasks.add_task(_remove_dir, job_dir)
         try:
-            with open(audio_path, "wb") as f:
-                f.write(await audio.read())
-            client = AceStepClient()
+            await _save_upload(audio, audio_path)
             result = await client.understand_audio(str(audio_path), temperature)
             return {"status": "ok", "data": result}
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=502, detail=f"ACE-Step understand failed: {e}"
             )
-        finally:
-            shutil.rmtree(job_dir, ignore_errors=True)
 
     @app.post("/api/ace-step/repaint")
     async def ace_step_repaint(
@@ -281,20 +500,21 @@ def create_app() -> FastAPI:
         prompt: str = Form(...),
         repainting_start: float = Form(0.0),
         repainting_end: float = Form(15.0),
-        background_tasks: BackgroundTasks = BackgroundTasks(),
+        client: AceStepClient = Depends(get_ace_client),
     ) -> dict:
         """Remix a section of existing audio. Returns a job_id to poll for result."""
         job_id = str(uuid.uuid4())
         job_dir = TEMP_DIR / job_id
         job_dir.mkdir(parents=True, exist_ok=True)
-        src_path = job_dir / (src_audio.filename or "source.mp3")
-        with open(src_path, "wb") as f:
-            f.write(await src_audio.read())
+        src_path, _ = await _save_reference_audio(
+            src_audio, job_dir, default_name="source.mp3"
+        )
 
-        jobs[job_id] = {"status": "processing", "result": None, "error": None}
-        background_tasks.add_task(
+        await jobs.start(job_id)
+        _spawn_job(
             _run_repaint,
             job_id,
+            client,
             str(src_path),
             prompt,
             repainting_start,
@@ -309,20 +529,19 @@ def create_app() -> FastAPI:
         lyrics: str = Form(""),
         audio_cover_strength: float = Form(0.2),
         audio_duration: float = Form(30),
-        background_tasks: BackgroundTasks = BackgroundTasks(),
+        client: AceStepClient = Depends(get_ace_client),
     ) -> dict:
         """Generate music using a reference audio for style. Returns a job_id."""
         job_id = str(uuid.uuid4())
         job_dir = TEMP_DIR / job_id
         job_dir.mkdir(parents=True, exist_ok=True)
-        ref_path = job_dir / (ref_audio.filename or "reference.mp3")
-        with open(ref_path, "wb") as f:
-            f.write(await ref_audio.read())
+        ref_path, _ = await _save_reference_audio(ref_audio, job_dir)
 
-        jobs[job_id] = {"status": "processing", "result": None, "error": None}
-        background_tasks.add_task(
+        await jobs.start(job_id)
+        _spawn_job(
             _run_style_transfer,
             job_id,
+            client,
             str(ref_path),
             prompt,
             lyrics,
@@ -334,7 +553,315 @@ def create_app() -> FastAPI:
     return app
 
 
-def _run_generation(
+async def _save_upload(
+    upload: UploadFile, dest: Path, hasher: Optional[Any] = None
+) -> None:
+    """Stream an uploaded file to ``dest`` in 1 MiB chunks.
+
+    Only one chunk is resident at a time and disk writes do not block the
+    event loop. If ``hasher`` (a hashlib object) is given, it is fed every
+    chunk as it is written.
+
+    When the upload has already been spooled to a temp file on disk and no
+    hash is needed, the bytes are copied kernel-side with ``os.sendfile``
+    instead of being read back through Python.
+
+    Raises HTTPException(413) and removes the partial file once more than
+    ``MAX_UPLOAD_BYTES`` have been received.
+    """
+    if hasher is None and getattr(upload.file, "_rolled", False):
+        src_fd = upload.file.fileno()
+        size = os.fstat(src_fd).st_size
+        if size > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Upload exceeds the {MAX_UPLOAD_BYTES} byte limit",
+            )
+        try:
+            await asyncio.to_thread(_sendfile_copy, src_fd, dest, size)
+            return
+        except OSError:
+            pass  # e.g. file-to-file sendfile unsupported; copy in chunks
+    total = 0
+    async with aiofiles.open(dest, "wb") as f:
+        while chunk := await upload.read(1 << 20):
+            total += len(chunk)
+            if total > MAX_UPLOAD_BYTES:
+                break
+            if hasher is not None:
+                hasher.update(chunk)
+            await f.write(chunk)
+    if total > MAX_UPLOAD_BYTES:
+        dest.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload exceeds the {MAX_UPLOAD_BYTES} byte limit",
+        )
+
+
+def _sendfile_copy(src_fd: int, dest: Path, size: int) -> None:
+    """Copy ``size`` bytes from the start of ``src_fd`` into ``dest``."""
+    with open(dest, "wb") as f:
+        offset = 0
+        while offset < size:
+            sent = os.sendfile(f.fileno(), src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+
+
+async def _push_status(websocket: WebSocket, job_id: str) -> None:
+    """Send the job's status on every change, closing once it is finished."""
+    updates = jobs.watch(job_id)
+    try:
+        async for job in updates:
+            if job is None:
+                await websocket.close(code=4404, reason="Job not found")
+                return
+            await websocket.send_text(_job_status_json(job_id, job))
+            if job["status"] in (COMPLETED, FAILED):
+                await websocket.close()
+                return
+    finally:
+        await updates.aclose()
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    """Read (and ignore) client messages until the client disconnects."""
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+def _job_status_json(job_id: str, job: dict) -> str:
+    """Serialize a stored job as a JobStatus JSON document.
+
+    The stored fields are trusted, so the model is built without validation
+    and encoded directly by pydantic-core.
+    """
+    return JobStatus.model_construct(
+        job_id=job_id,
+        status=job["status"],
+        result=job.get("result"),
+        error=job.get("error"),
+    ).model_dump_json()
+
+
+def _safe_filename(filename: Optional[str], default: str) -> str:
+    """Reduce a client-supplied filename to a bare name inside the job dir.
+
+    Directory components (either separator) are dropped so the name cannot
+    escape the job directory. Falls back to ``default`` when no name is given.
+    """
+    if not filename:
+        return default
+    name = Path(filename.replace("\\", "/")).name
+    if not name or name in (".", "..") or "\x00" in name:
+        raise HTTPException(status_code=400, detail=f"Invalid filename: {filename!r}")
+    return name
+
+
+def _unique_names(names: list[str]) -> list[str]:
+    """Make ``names`` distinct by suffixing repeats with ``-1``, ``-2``, ...
+
+    Different client filenames can sanitize to the same name (``a/x.png``
+    and ``b/x.png``); uploads written concurrently must not share a file.
+    """
+    seen: set[str] = set()
+    unique: list[str] = []
+    for name in names:
+        stem, suffix = Path(name).stem, Path(name).suffix
+        candidate, n = name, 0
+        while candidate in seen:
+            n += 1
+            candidate = f"{stem}-{n}{suffix}"
+        seen.add(candidate)
+        unique.append(candidate)
+    return unique
+
+
+async def _persist_upload(upload: UploadFile, dest: Path) -> str:
+    """Save one upload to ``dest`` and return its path.
+
+    Used to fan out multi-file requests; ``_upload_slots`` bounds how many
+    files are written in parallel.
+    """
+    async with _upload_slots:
+        await _save_upload(upload, dest)
+    return str(dest)
+
+
+async def _save_reference_audio(
+    upload: UploadFile, job_dir: Path, default_name: str = "reference.mp3"
+) -> tuple[Path, str]:
+    """Save an uploaded audio file into ``job_dir``, deduplicated by content.
+
+    The upload is hashed while it is written. Identical files re-used across
+    iterations are stored once under ``REFS_DIR/<hash><ext>`` and hard-linked
+    into each job directory instead of being written again.
+
+    The link is named ``ref_<hash><ext>`` rather than after the client's
+    filename, so it can never collide with (and be overwritten as) a
+    generated output such as ``output.mp3``; ``default_name`` only supplies
+    the extension when the upload has no filename. Reusing a stored
+    reference renews its mtime, so the janitor expires references by last
+    use rather than by first upload.
+
+    Returns the path inside ``job_dir`` and the hex content hash.
+    """
+    name = _safe_filename(upload.filename, default_name)
+    hasher = hashlib.blake2b(digest_size=16)
+    tmp_path = REFS_DIR / f".{uuid.uuid4().hex}.part"
+    try:
+        await _save_upload(upload, tmp_path, hasher)
+        digest = hasher.hexdigest()
+        suffix = Path(name).suffix.lower()
+        ref_path = REFS_DIR / f"{digest}{suffix}"
+        if ref_path.exists():
+            log.info("Reusing stored reference audio %s", ref_path.name)
+            os.utime(ref_path)
+        else:
+            tmp_path.replace(ref_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    dest = job_dir / f"ref_{digest}{suffix}"
+    # The copy fallback can move a whole track; keep it off the event loop
+    await asyncio.get_running_loop().run_in_executor(
+        None, _link_fresh, ref_path, dest
+    )
+    return dest, digest
+
+
+def _link_or_copy(src: Path, dest: Path) -> bool:
+    """Hard-link ``src`` to ``dest``, copying when linking is not possible.
+
+    An existing ``dest`` is kept as is (returns False): it may be a hard link
+    shared with other jobs, so it is never written through. The copy fallback
+    goes via a temp file and ``os.replace``, which swaps the directory entry
+    instead. Returns True once ``dest`` holds ``src``.
+    """
+    try:
+        os.link(src, dest)
+        return True
+    except FileExistsError:
+        return False
+    except OSError:
+        pass  # cross-device or unsupported filesystem — copy instead
+    tmp = dest.with_name(f".{uuid.uuid4().hex}.part")
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return True
+
+
+def _link_fresh(src: Path, dest: Path) -> None:
+    """``_link_or_copy`` ``src`` to ``dest`` and mark it as modified now.
+
+    A hard link shares its inode, and so its mtime, with ``src``. The janitor
+    judges age by mtime, so without this a newly linked file would look as
+    old as the entry it was linked from (which is refreshed too).
+    """
+    _link_or_copy(src, dest)
+    os.utime(dest)
+
+
+def _write_replacing(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` via a temp file and ``os.replace``."""
+    tmp = path.with_name(f".{uuid.uuid4().hex}.part")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _remove_dir(path: Path) -> None:
+    """Recursively delete ``path``, ignoring errors."""
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def _music_cache_key(
+    vibe_tree: dict, reference_audio_hash: str | None, audio_duration: float
+) -> str:
+    """Hash the inputs of a music generation into a stable cache key."""
+    canonical = orjson.dumps(
+        {
+            "vibe_tree": vibe_tree,
+            "reference_audio": reference_audio_hash,
+            "audio_duration": audio_duration,
+        },
+        option=orjson.OPT_SORT_KEYS,
+        default=str,
+    )
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+def _load_cached_music(cache_key: str, audio_path: Path) -> dict | None:
+    """Materialize a cached generation at ``audio_path``.
+
+    Returns the cached job result (without ``audio_url``), or None on a miss
+    or when the entry is older than ``ACE_CACHE_TTL_SECONDS``. A hit renews
+    the entry, so the TTL expires entries that have not been used recently.
+    """
+    meta_path = ACE_CACHE_DIR / f"{cache_key}.json"
+    try:
+        if time.time() - meta_path.stat().st_mtime > ACE_CACHE_TTL_SECONDS:
+            return None
+        result = orjson.loads(meta_path.read_bytes())
+        _link_fresh(ACE_CACHE_DIR / f"{cache_key}.mp3", audio_path)
+        os.utime(meta_path)
+    except (OSError, ValueError):
+        return None
+    return result
+
+
+def _store_cached_music(cache_key: str, audio_path: Path, result: dict) -> None:
+    """Store a finished generation so identical requests can reuse it.
+
+    If another job already cached the same key, its entry is kept.
+    """
+    try:
+        if not _link_or_copy(audio_path, ACE_CACHE_DIR / f"{cache_key}.mp3"):
+            return
+        # Metadata is written last so a partial entry is never treated as a hit
+        _write_replacing(ACE_CACHE_DIR / f"{cache_key}.json", orjson.dumps(result))
+    except OSError as e:
+        log.warning("Failed to cache ACE-Step output %s: %s", cache_key, e)
+
+
+async def _gated(job_id: str, job: Coroutine[Any, Any, None]) -> None:
+    """Await a background job while holding one of the generation slots.
+
+    If the task is cancelled (at shutdown), whether still queued for a slot
+    or mid-run, the job is marked failed so its status does not stay
+    "processing" forever.
+    """
+    try:
+        async with _generation_slots:
+            await job
+    except asyncio.CancelledError:
+        job.close()  # no-op once the job has run; else it never starts
+        await jobs.fail(job_id, "Cancelled: the server shut down")
+        raise
+
+
+def _spawn_job(
+    func: Callable[..., Coroutine[Any, Any, None]], job_id: str, *args: Any
+) -> None:
+    """Schedule ``func(job_id, *args)`` as a background job on the event loop.
+
+    The job only starts once a generation slot is free, so at most
+    ``MAX_CONCURRENT_GENERATIONS`` jobs hit the backends at the same time;
+    the rest wait in the semaphore queue with status "processing".
+    """
+    task = asyncio.create_task(_gated(job_id, func(job_id, *args)))
+    _background_jobs.add(task)
+    task.add_done_callback(_background_jobs.discard)
+
+
+async def _run_generation(
     job_id: str,
     file_paths: list[str],
     text: str | None,
@@ -342,28 +869,60 @@ def _run_generation(
     max_video_frames: int,
     disable_web_search: bool,
     use_mock: bool = False,
+    video_frame_mode: KeyframeMode = "evenly_spaced",
 ) -> None:
-    """Run vibe-tree generation in the background (sync — runs in threadpool).
+    """Run vibe-tree generation in the background.
 
     This ONLY produces the vibe tree — no music generation.
     Music generation happens separately via /api/generate-music.
 
-    Must be a regular (non-async) function so FastAPI runs it in a thread,
-    preventing the synchronous OpenAI SDK call from blocking the event loop.
+    The tree itself is built by ``_generate_tree`` on a worker thread, so the
+    synchronous OpenAI SDK call cannot block the event loop; the job status
+    is recorded back here on the loop.
+    """
+    try:
+        vibe_tree_dict = await asyncio.to_thread(
+            _generate_tree,
+            job_id,
+            file_paths,
+            text,
+            model_name,
+            max_video_frames,
+            disable_web_search,
+            use_mock,
+            video_frame_mode,
+        )
+    except Exception as e:
+        log.error(
+            "Error during generation for job %s: %s", job_id, e, exc_info=True
+        )
+        await jobs.fail(job_id, str(e))
+        return
+
+    await jobs.complete(job_id, {"vibe_tree": vibe_tree_dict})
+    log.info("[%s] Tree generation complete (no music generation)", job_id)
+
+
+def _generate_tree(
+    job_id: str,
+    file_paths: list[str],
+    text: str | None,
+    model_name: Optional[str],
+    max_video_frames: int,
+    disable_web_search: bool,
+    use_mock: bool,
+    video_frame_mode: KeyframeMode,
+) -> dict:
+    """Build the vibe tree for a job and return it as a dict (blocking).
+
+    The job's uploaded inputs are deleted afterwards, whether or not
+    generation succeeded.
     """
     try:
-        log.info(f"Starting tree generation for job {job_id}")
-        log.info(f"  Files: {file_paths}")
-        log.info(f"  Text: {text}")
-        log.info(f"  Use mock: {use_mock}")
-
-        # Get thinking budget from environment or use default
-        thinking_budget = None
-        if os.getenv("THINKING_BUDGET"):
-            try:
-                thinking_budget = int(os.getenv("THINKING_BUDGET"))
-            except ValueError:
-                log.warning("Invalid THINKING_BUDGET env var, using default")
+        log.info("Starting tree generation for job %s", job_id)
+        log.info("  Files: %s", file_paths)
+        log.info("  Text: %s", text)
+        log.info("  Use mock: %s", use_mock)
 
         vibe_tree = asyncio.run(
             generate_music_prompt(
@@ -375,7 +934,8 @@ def _run_generation(
                 debug=False,
                 disable_web_search=disable_web_search,
                 use_mock=use_mock,
-                thinking_budget=thinking_budget,
+                thinking_budget=THINKING_BUDGET,
+                video_frame_mode=video_frame_mode,
             )
         )
 
@@ -383,23 +943,8 @@ def _run_generation(
         vibe_tree_dict = (
             vibe_tree.model_dump() if hasattr(vibe_tree, "model_dump") else vibe_tree
         )
-        log.info(f"[{job_id}] Vibe tree generated successfully")
-
-        jobs[job_id] = {
-            "status": "completed",
-            "result": {"vibe_tree": vibe_tree_dict},
-            "error": None,
-        }
-
-        log.info(f"[{job_id}] Tree generation complete (no music generation)")
-
-    except Exception as e:
-        log.error(f"Error during generation for job {job_id}: {e}", exc_info=True)
-        jobs[job_id] = {
-            "status": "failed",
-            "result": None,
-            "error": str(e),
-        }
+        log.info("[%s] Vibe tree generated successfully", job_id)
+        return vibe_tree_dict
 
     finally:
         # Clean up temporary input files
@@ -409,26 +954,67 @@ def _run_generation(
                 f.unlink(missing_ok=True)
 
 
-def _run_music_generation(
+async def _run_ace(
+    job_id: str, task: str, ace_call: Callable[[Path], Awaitable[dict]]
+) -> None:
+    """Shared scaffold for ACE-Step background jobs.
+
+    Awaits ``ace_call(audio_path)``, which must write the generated audio to
+    ``output.mp3`` in the job directory (created by the route) and return the
+    job's result fields. The job is then marked completed with an
+    ``audio_url`` added, or failed if anything raised.
+    """
+    log.info("Starting %s for job %s", task, job_id)
+    audio_path = TEMP_DIR / job_id / "output.mp3"
+    try:
+        job_result = await ace_call(audio_path)
+        log.info("Saved %s audio to %s", task, audio_path)
+
+        await jobs.complete(
+            job_id, {"audio_url": f"/api/audio/{job_id}", **job_result}
+        )
+        log.info("Completed %s for job %s", task, job_id)
+    except Exception as e:
+        log.error("Error during %s for job %s: %s", task, job_id, e, exc_info=True)
+        await jobs.fail(job_id, str(e))
+
+
+async def _run_music_generation(
     job_id: str,
+    client: AceStepClient,
     vibe_tree: dict,
     reference_audio_path: str | None,
     audio_duration: float = 30,
+    cache_key: str | None = None,
 ) -> None:
-    """Run ACE-Step music generation in the background (sync — runs in threadpool)."""
-    try:
-        log.info(f"Starting music generation for job {job_id}")
+    """Run ACE-Step music generation in the background.
+
+    When ``cache_key`` is given and a previous generation with the same key is
+    cached, its audio is reused and ACE-Step is not called at all.
+    """
+
+    async def generate(audio_path: Path) -> dict:
+        if cache_key:
+            cached = await asyncio.to_thread(
+                _load_cached_music, cache_key, audio_path
+            )
+            if cached is not None:
+                log.info("[%s] Reusing cached ACE-Step output %s", job_id, cache_key)
+                return cached
 
         # Assembly pass — LLM converts (user-edited) tree to coherent caption + lyrics
-        log.info(f"[{job_id}] Running assembly pass on edited tree...")
-        assembled = asyncio.run(assemble_music_prompt(vibe_tree=vibe_tree))
+        log.info("[%s] Running assembly pass on edited tree...", job_id)
+        assembled = await assemble_music_prompt(vibe_tree=vibe_tree)
         if assembled.get("prompt"):
             log.info(
-                f"[{job_id}] Assembly pass succeeded: caption='{assembled['prompt'][:80]}...'"
+                "[%s] Assembly pass succeeded: caption='%.80s...'",
+                job_id,
+                assembled["prompt"],
             )
         else:
             log.warning(
-                f"[{job_id}] Assembly pass returned empty, falling back to mechanical conversion"
+                "[%s] Assembly pass returned empty, falling back to mechanical conversion",
+                job_id,
             )
 
         params = vibe_tree_to_ace_step_params(
@@ -437,117 +1023,65 @@ def _run_music_generation(
             assembled_prompt=assembled if assembled.get("prompt") else None,
             audio_duration=audio_duration,
         )
-        log.info(f"  ACE-Step params: prompt={params.get('prompt', '')[:100]}...")
+        log.info("  ACE-Step params: prompt=%.100s...", params.get("prompt", ""))
 
-        client = AceStepClient()
-        result = asyncio.run(client.generate_music(params))
-
-        # Save audio to job directory
-        job_dir = TEMP_DIR / job_id
-        job_dir.mkdir(parents=True, exist_ok=True)
-        audio_path = job_dir / "output.mp3"
-        audio_path.write_bytes(result["audio_bytes"])
-        log.info(f"Saved audio to {audio_path} ({len(result['audio_bytes'])} bytes)")
-
-        jobs[job_id] = {
-            "status": "completed",
-            "result": {
-                "audio_url": f"/api/audio/{job_id}",
-                "descriptions": result["descriptions"],
-                **({"assembled_prompt": assembled} if assembled.get("prompt") else {}),
-            },
-            "error": None,
+        result = await client.generate_music(params, out_path=audio_path)
+        job_result = {
+            "descriptions": result["descriptions"],
+            **({"assembled_prompt": assembled} if assembled.get("prompt") else {}),
         }
-        log.info(f"Completed music generation for job {job_id}")
+        if cache_key and result["audio_size"]:
+            await asyncio.to_thread(
+                _store_cached_music, cache_key, audio_path, job_result
+            )
+        return job_result
 
-    except Exception as e:
-        log.error(f"Error during music generation for job {job_id}: {e}", exc_info=True)
-        jobs[job_id] = {
-            "status": "failed",
-            "result": None,
-            "error": str(e),
-        }
+    await _run_ace(job_id, "music generation", generate)
 
 
-def _run_repaint(
+async def _run_repaint(
     job_id: str,
+    client: AceStepClient,
     src_audio_path: str,
     prompt: str,
     repainting_start: float,
     repainting_end: float,
 ) -> None:
-    """Run ACE-Step repaint/remix in the background (sync — runs in threadpool)."""
-    try:
-        log.info(f"Starting repaint for job {job_id}")
-        client = AceStepClient()
-        result = asyncio.run(
-            client.repaint(
-                src_audio_path=src_audio_path,
-                prompt=prompt,
-                repainting_start=repainting_start,
-                repainting_end=repainting_end,
-            )
+    """Run ACE-Step repaint/remix in the background."""
+
+    async def repaint(audio_path: Path) -> dict:
+        result = await client.repaint(
+            src_audio_path=src_audio_path,
+            prompt=prompt,
+            repainting_start=repainting_start,
+            repainting_end=repainting_end,
+            out_path=audio_path,
         )
+        return {"descriptions": result["descriptions"]}
 
-        job_dir = TEMP_DIR / job_id
-        job_dir.mkdir(parents=True, exist_ok=True)
-        audio_path = job_dir / "output.mp3"
-        audio_path.write_bytes(result["audio_bytes"])
-        log.info(
-            f"Saved repainted audio to {audio_path} ({len(result['audio_bytes'])} bytes)"
-        )
-
-        jobs[job_id] = {
-            "status": "completed",
-            "result": {
-                "audio_url": f"/api/audio/{job_id}",
-                "descriptions": result["descriptions"],
-            },
-            "error": None,
-        }
-    except Exception as e:
-        log.error(f"Error during repaint for job {job_id}: {e}", exc_info=True)
-        jobs[job_id] = {"status": "failed", "result": None, "error": str(e)}
+    await _run_ace(job_id, "repaint", repaint)
 
 
-def _run_style_transfer(
+async def _run_style_transfer(
     job_id: str,
+    client: AceStepClient,
     ref_audio_path: str,
     prompt: str,
     lyrics: str,
     audio_cover_strength: float,
     audio_duration: float,
 ) -> None:
-    """Run ACE-Step style transfer in the background (sync — runs in threadpool)."""
-    try:
-        log.info(f"Starting style transfer for job {job_id}")
-        client = AceStepClient()
-        result = asyncio.run(
-            client.style_transfer(
-                ref_audio_path=ref_audio_path,
-                prompt=prompt,
-                lyrics=lyrics,
-                audio_cover_strength=audio_cover_strength,
-                audio_duration=audio_duration,
-            )
-        )
-
-        job_dir = TEMP_DIR / job_id
-        job_dir.mkdir(parents=True, exist_ok=True)
-        audio_path = job_dir / "output.mp3"
-        audio_path.write_bytes(result["audio_bytes"])
-        log.info(
-            f"Saved style-transferred audio to {audio_path} ({len(result['audio_bytes'])} bytes)"
+    """Run ACE-Step style transfer in the background."""
+
+    async def style_transfer(audio_path: Path) -> dict:
+        result = await client.style_transfer(
+            ref_audio_path=ref_audio_path,
+            prompt=prompt,
+            lyrics=lyrics,
+            audio_cover_strength=audio_cover_strength,
+            audio_duration=audio_duration,
+            out_path=audio_path,
         )
+        return {"descriptions": result["descriptions"]}
 
-        jobs[job_id] = {
-            "status": "completed",
-            "result": {
-                "audio_url": f"/api/audio/{job_id}",
-                "descriptions": result["descriptions"],
-            },
-            "error": None,
-        }
-    except Exception as e:
-        log.error(f"Error during style transfer for job {job_id}: {e}", exc_info=True)
-        jobs[job_id] = {"status": "failed", "result": None, "error": str(e)}
+    await _run_ace(job_id, "style transfer", style_transfer)
@@ -1,20 +1,76 @@
 from __future__ import annotations
 
-import io
+import logging
+import re
+import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator, Literal
 
 import cv2
-from PIL import Image
+
+try:
+    from turbojpeg import TJPF_BGR, TJSAMP_420, TurboJPEG
+
+    _turbo: TurboJPEG | None = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    # Optional fast path: needs PyTurboJPEG (the ``turbojpeg`` extra) and the
+    # libturbojpeg shared library; otherwise OpenCV's encoder is used
+    _turbo = None
+
+log = logging.getLogger(__name__)
+
+# Above this many frames between samples, seeking to each keyframe is cheaper
+# than decoding the whole stream sequentially
+SEEK_STEP_THRESHOLD = 60
+
+# Longest edge of an extracted keyframe; vision models downsample past this
+MAX_FRAME_DIMENSION = 1024
+
+JPEG_QUALITY = 80
+JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+
+# Encoder threads, and how many decoded frames may wait for them at once
+ENCODE_WORKERS = 2
+MAX_PENDING_FRAMES = 4
+
+# Presentation time of each frame, as logged by ffmpeg's showinfo filter
+_SHOWINFO_PTS_TIME = re.compile(rb"\bpts_time:\s*(-?[\d.]+)")
+
+# How extract_keyframes picks frames: sampled evenly, or the video's I-frames
+KeyframeMode = Literal["evenly_spaced", "keyframes"]
 
 
 def extract_keyframes(
-    video_path: str | Path, max_frames: int = 6
+    video_path: str | Path,
+    max_frames: int = 6,
+    mode: KeyframeMode = "evenly_spaced",
 ) -> list[tuple[bytes, float]]:
     """Extract evenly-spaced keyframes from a video file.
 
+    With ``mode="keyframes"`` only the video's I-frames are decoded (via the
+    ffmpeg CLI), and up to ``max_frames`` of them are picked evenly. This
+    falls back to evenly spaced sampling when ffmpeg is not installed or
+    fails on the file.
+
+    Blocks until the video is decoded (including the ffmpeg subprocess), so
+    call it from a worker thread rather than an event loop.
+
     Returns a list of (JPEG-encoded image bytes, timestamp_seconds) tuples,
     suitable for passing to an LLM as BinaryContent with temporal annotations.
     """
+    if mode == "keyframes":
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            log.warning("ffmpeg not found, sampling %s evenly instead", video_path)
+        else:
+            try:
+                return _extract_iframes(ffmpeg, video_path, max_frames)
+            except ValueError as e:
+                log.warning("%s; sampling evenly instead", e)
+
     cap = cv2.VideoCapture(str(video_path))
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
@@ -24,21 +80,146 @@ def extract_keyframes(
         raise ValueError(f"Could not read frames from {video_path}")
 
     step = max(1, total_frames // max_frames)
-    indices = list(range(0, total_frames, step))[:max_frames]
+    indices = [i * step for i in range(min(max_frames, total_frames))]
 
+    # Decode on this thread while earlier frames are resized and encoded on
+    # the pool; OpenCV releases the GIL in both, so the stages overlap.
     frames: list[tuple[bytes, float]] = []
-    for idx in indices:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
-        if not ret:
-            continue
-        timestamp = idx / fps
-        # Convert BGR (OpenCV) to RGB (PIL)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(rgb)
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=80)
-        frames.append((buf.getvalue(), timestamp))
-
-    cap.release()
+    pending: deque[tuple[Future[bytes | None], float]] = deque()
+    try:
+        with ThreadPoolExecutor(max_workers=ENCODE_WORKERS) as pool:
+            for idx, frame in _read_frames(cap, indices, step):
+                pending.append((pool.submit(_encode_frame, frame), idx / fps))
+                if len(pending) > MAX_PENDING_FRAMES:
+                    _collect(pending.popleft(), frames)
+            while pending:
+                _collect(pending.popleft(), frames)
+    finally:
+        cap.release()
     return frames
+
+
+def _encode_frame(frame: cv2.typing.MatLike) -> bytes | None:
+    """Downscale a BGR frame and JPEG-encode it; None if encoding fails."""
+    frame = _downscale(frame, MAX_FRAME_DIMENSION)
+    # Encode straight from BGR; libjpeg-turbo handles the channel order
+    if _turbo is not None:
+        return _turbo.encode(
+            frame,
+            quality=JPEG_QUALITY,
+            pixel_format=TJPF_BGR,
+            jpeg_subsample=TJSAMP_420,
+        )
+    ok, encoded = cv2.imencode(".jpg", frame, JPEG_PARAMS)
+    return encoded.tobytes() if ok else None
+
+
+def _collect(
+    item: tuple[Future[bytes | None], float], frames: list[tuple[bytes, float]]
+) -> None:
+    """Append a finished encode to ``frames``, skipping failed ones."""
+    future, timestamp = item
+    jpeg = future.result()
+    if jpeg is not None:
+        frames.append((jpeg, timestamp))
+
+
+def _extract_iframes(
+    ffmpeg: str, video_path: str | Path, max_frames: int
+) -> list[tuple[bytes, float]]:
+    """Decode only the I-frames of a video with ffmpeg, as JPEGs.
+
+    ffmpeg skips every non-key frame at the decoder, scales to
+    ``MAX_FRAME_DIMENSION`` and writes an MJPEG stream to stdout; frame
+    timestamps come from the showinfo filter on stderr.
+    """
+    scale = (
+        f"scale='min({MAX_FRAME_DIMENSION},iw)':'min({MAX_FRAME_DIMENSION},ih)'"
+        ":force_original_aspect_ratio=decrease"
+    )
+    cmd = [
+        ffmpeg,
+        "-hide_banner",
+        "-nostdin",
+        "-skip_frame",
+        "nokey",
+        "-i",
+        str(video_path),
+        "-vf",
+        f"{scale},showinfo",
+        # Keep each frame's own timestamp; spelled -vsync so ffmpeg 4.x works
+        "-vsync",
+        "0",
+        "-f",
+        "image2pipe",
+        "-c:v",
+        "mjpeg",
+        "-q:v",
+        "3",
+        "-",
+    ]
+    proc = subprocess.run(cmd, capture_output=True, check=False)
+    if proc.returncode != 0 or not proc.stdout:
+        lines = proc.stderr.decode(errors="replace").strip().splitlines()
+        detail = lines[-1] if lines else f"ffmpeg exited with {proc.returncode}"
+        raise ValueError(f"Could not read frames from {video_path}: {detail}")
+
+    jpegs = _split_mjpeg(proc.stdout)
+    timestamps = [float(t) for t in _SHOWINFO_PTS_TIME.findall(proc.stderr)]
+    if len(jpegs) != len(timestamps):
+        raise ValueError(
+            f"Could not match frames from {video_path}: "
+            f"{len(jpegs)} images but {len(timestamps)} timestamps"
+        )
+    frames = list(zip(jpegs, timestamps))
+    if len(frames) > max_frames:
+        frames = [frames[i * len(frames) // max_frames] for i in range(max_frames)]
+    return frames
+
+
+def _split_mjpeg(stream: bytes) -> list[bytes]:
+    """Split concatenated JPEGs at each end-of-image/start-of-image boundary."""
+    parts = stream.split(b"\xff\xd9\xff\xd8")
+    if len(parts) == 1:
+        return parts
+    return (
+        [parts[0] + b"\xff\xd9"]
+        + [b"\xff\xd8" + p + b"\xff\xd9" for p in parts[1:-1]]
+        + [b"\xff\xd8" + parts[-1]]
+    )
+
+
+def _read_frames(
+    cap: cv2.VideoCapture, indices: list[int], step: int
+) -> Iterator[tuple[int, cv2.typing.MatLike]]:
+    """Yield ``(index, BGR frame)`` for each of the sorted frame ``indices``.
+
+    For dense sampling the stream is walked with ``grab()``, which demuxes
+    without converting, and only the wanted frames are ``retrieve()``d. For
+    sparse sampling each index is seeked to directly.
+    """
+    if step > SEEK_STEP_THRESHOLD:
+        for idx in indices:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            ret, frame = cap.read()
+            if ret:
+                yield idx, frame
+        return
+
+    targets = set(indices)
+    for i in range(indices[-1] + 1):
+        if not cap.grab():
+            return
+        if i in targets:
+            ret, frame = cap.retrieve()
+            if ret:
+                yield i, frame
+
+
+def _downscale(frame: cv2.typing.MatLike, max_dim: int) -> cv2.typing.MatLike:
+    """Shrink ``frame`` so its longest edge is at most ``max_dim`` pixels."""
+    h, w = frame.shape[:2]
+    scale = max_dim / max(h, w)
+    if scale >= 1.0:
+        return frame
+    return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
@@ -19,13 +19,18 @@ from __future__ import annotations
 
 import asyncio
 import base64
-import json
 import logging
 import os
+import random
+import time
+import uuid
 from pathlib import Path
-from typing import Any, Optional
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Mapping, Optional
 
+import aiofiles
 import httpx
+import orjson
 
 from src.models.song_tree import SongCharacteristics, SongNode
 
@@ -36,6 +41,37 @@ DEFAULT_ACESTEP_URL = "https://abox-noneruptive-felisha.ngrok-free.dev"
 DEFAULT_ACESTEP_USER = "admin"
 DEFAULT_ACESTEP_PASS = "goldenhands"
 
+# How long list_models / server_stats results are reused, in seconds
+MODELS_CACHE_TTL = 300.0
+STATS_CACHE_TTL = 5.0
+
+# submit_task params naming local files to upload rather than form fields
+_FILE_PATH_PARAMS = frozenset(("_src_audio_path", "_ref_audio_path"))
+
+# /query_result polling cadence: first delay and back-off ceiling, in seconds
+POLL_INTERVAL = 1.0
+POLL_MAX_INTERVAL = 10.0
+
+# Consecutive failed /query_result polls a task survives before it is failed
+POLL_MAX_FAILURES = 3
+
+# Root metadata already folded into the description; skipped per node
+SUMMARY_SKIP_META_KEYS = frozenset(("tags", "overall_arc"))
+
+# Settings shared by every generation built from a tree
+_GENERATION_DEFAULTS: Mapping[str, Any] = MappingProxyType(
+    {"inference_steps": 8, "batch_size": 1, "audio_format": "mp3"}
+)
+
+# Most phrases taken from a tree for the sample_query; later nodes are dropped
+SUMMARY_MAX_PHRASES = 64
+
+# Shared read-only default for nodes without metadata
+_EMPTY_METADATA: Mapping[str, Any] = MappingProxyType({})
+
+# A song tree node's (name, value, metadata, children)
+_NodeFields = tuple[str, Any, Mapping[str, Any], list | tuple]
+
 
 def song_characteristics_to_ace_step_params(
     song_chars: SongCharacteristics | dict,
@@ -61,26 +97,32 @@ def song_characteristics_to_ace_step_params(
         audio_duration: Optional explicit audio duration in seconds. If provided,
             it takes precedence over duration in the tree.
     """
-    # Convert Pydantic model to dict if needed
+    # Walk the Pydantic model as-is rather than dumping it to dicts first
+    root: SongNode | dict
+    fields: Callable[[Any], _NodeFields]
     if isinstance(song_chars, SongCharacteristics):
-        tree_dict = song_chars.model_dump()
+        root = song_chars.root
+        fields = _song_node_fields
     else:
+        fields = _dict_node_fields
         tree_dict = song_chars
-
-    if not tree_dict:
-        log.warning("song_chars is empty, using defaults")
-        tree_dict = {}
-
-    root = tree_dict.get("root") or tree_dict
-    if not root:
-        log.error("Could not find root in tree_dict. Keys: %s", list(tree_dict.keys()))
-        root = {}
+        if not tree_dict:
+            log.warning("song_chars is empty, using defaults")
+            tree_dict = {}
+
+        root = tree_dict.get("root") or tree_dict
+        if not root:
+            log.error(
+                "Could not find root in tree_dict. Keys: %s", list(tree_dict.keys())
+            )
+            root = {}
+    title, _, root_meta, _ = fields(root)
 
     # Use explicit audio_duration if provided, otherwise extract from tree
     if audio_duration is not None:
         final_audio_duration = min(float(audio_duration), 120)
     else:
-        duration = root.get("metadata", {}).get("duration_seconds")
+        duration = root_meta.get("duration_seconds")
         final_audio_duration = min(float(duration), 120) if duration is not None else 30
 
     # ── If assembly pass produced a prompt, use direct prompt+lyrics ──
@@ -88,9 +130,7 @@ def song_characteristics_to_ace_step_params(
         params: dict[str, Any] = {
             "prompt": assembled_prompt["prompt"],
             "lyrics": assembled_prompt.get("lyrics", "[Instrumental]"),
-            "inference_steps": 8,
-            "batch_size": 1,
-            "audio_format": "mp3",
+            **_GENERATION_DEFAULTS,
             "audio_duration": final_audio_duration,
         }
         log.info(
@@ -104,53 +144,15 @@ def song_characteristics_to_ace_step_params(
     description_parts: list[str] = []
 
     # Title
-    title = root.get("name", "")
     if title:
         description_parts.append(f'"{title}".')
 
     # Tags
-    tags = root.get("metadata", {}).get("tags", [])
+    tags = root_meta.get("tags", [])
     if tags:
         description_parts.append(f"Tags: {', '.join(str(t) for t in tags)}.")
 
-    # Collect key characteristics from the tree
-    def summarise_node(node: dict | None, depth: int = 0) -> str:
-        if node is None or depth > 4:
-            return ""
-        parts: list[str] = []
-        name = node.get("name", "")
-        value = node.get("value")
-
-        if value is not None:
-            if isinstance(value, list):
-                val_str = ", ".join(str(v) for v in value if v)
-            else:
-                val_str = str(value)
-            if val_str:
-                parts.append(f"{name}: {val_str}")
-        elif name:
-            # Check metadata for interesting values
-            meta = node.get("metadata", {})
-            meta_strs = []
-            for k, v in meta.items():
-                if k in ("tags", "overall_arc"):
-                    continue  # already handled
-                if isinstance(v, list):
-                    meta_strs.append(f"{k}={', '.join(str(x) for x in v)}")
-                elif v is not None:
-                    meta_strs.append(f"{k}={v}")
-            if meta_strs:
-                parts.append(f"{name} ({'; '.join(meta_strs)})")
-
-        # Recurse into children
-        for child in node.get("children", []):
-            child_summary = summarise_node(child, depth + 1)
-            if child_summary:
-                parts.append(child_summary)
-
-        return ". ".join(parts)
-
-    tree_summary = summarise_node(root)
+    tree_summary = _summarise_tree(root)
     if tree_summary:
         description_parts.append(tree_summary)
 
@@ -162,9 +164,7 @@ def song_characteristics_to_ace_step_params(
     params = {
         "sample_query": sample_query,
         "thinking": True,
-        "inference_steps": 8,
-        "batch_size": 1,
-        "audio_format": "mp3",
+        **_GENERATION_DEFAULTS,
         "audio_duration": audio_duration,
     }
 
@@ -175,6 +175,74 @@ def song_characteristics_to_ace_step_params(
     return params
 
 
+def _song_node_fields(node: SongNode) -> _NodeFields:
+    """Return a node's ``(name, value, metadata, children)``."""
+    return node.name, node.value, node.metadata, node.children
+
+
+def _dict_node_fields(node: dict) -> _NodeFields:
+    """``_song_node_fields`` for the JSON dict form of a SongNode.
+
+    Missing metadata and children come back empty.
+    """
+    return (
+        node.get("name", ""),
+        node.get("value"),
+        node.get("metadata") or _EMPTY_METADATA,
+        node.get("children") or (),
+    )
+
+
+def _summarise_tree(
+    root_node: SongNode | dict | None, max_phrases: int = SUMMARY_MAX_PHRASES
+) -> str:
+    """Describe a song tree's values and metadata as ". "-joined phrases.
+
+    Nodes are visited in pre-order down to depth 4, stopping once
+    ``max_phrases`` phrases have been collected.
+    """
+    # Trees are all SongNodes or all dicts, so pick the accessor once
+    fields: Callable[[Any], _NodeFields] = (
+        _song_node_fields if isinstance(root_node, SongNode) else _dict_node_fields
+    )
+    out: list[str] = []
+    stack: list[tuple[SongNode | dict | None, int]] = [(root_node, 0)]
+    while stack and len(out) < max_phrases:
+        node, depth = stack.pop()
+        if node is None or depth > 4:
+            continue
+        name, value, metadata, children = fields(node)
+
+        if value is not None:
+            # Exact type checks: values come from JSON, so no subclasses
+            kind = type(value)
+            if kind is str:
+                val_str = value
+            elif kind is list:
+                val_str = ", ".join(str(v) for v in value if v)
+            else:
+                val_str = str(value)
+            if val_str:
+                out.append(f"{name}: {val_str}")
+        elif name:
+            # Check metadata for interesting values
+            meta_strs = []
+            for k, v in metadata.items():
+                if k in SUMMARY_SKIP_META_KEYS:
+                    continue  # already handled
+                if type(v) is list:
+                    meta_strs.append(f"{k}={', '.join(str(x) for x in v)}")
+                elif v is not None:
+                    meta_strs.append(f"{k}={v}")
+            if meta_strs:
+                out.append(f"{name} ({'; '.join(meta_strs)})")
+
+        # Push children reversed so they pop in document order
+        stack.extend((child, depth + 1) for child in reversed(children))
+
+    return ". ".join(out)
+
+
 def vibe_tree_to_ace_step_params(
     vibe_tree: dict,
     reference_audio_path: str | None = None,
@@ -250,9 +318,7 @@ def vibe_tree_to_ace_step_params(
     params: dict[str, Any] = {
         "sample_query": sample_query,
         "thinking": True,
-        "inference_steps": 8,
-        "batch_size": 1,
-        "audio_format": "mp3",
+        **_GENERATION_DEFAULTS,
         "audio_duration": min(final_duration, 240),
     }
 
@@ -266,6 +332,11 @@ class AceStepClient:
     Auth is configured via environment variables:
       - ACESTEP_API_URL: base URL (default: ngrok tunnel)
       - ACESTEP_API_USER / ACESTEP_API_PASS: HTTP basic auth (for ngrok)
+
+    Requests share one pooled ``httpx.AsyncClient`` (created on first use), so
+    keep-alive connections and TLS sessions are reused between calls. The
+    pool is bound to the event loop it was created on; close it with
+    ``aclose()`` or use the client as an async context manager.
     """
 
     def __init__(
@@ -283,8 +354,49 @@ class AceStepClient:
         self.password = (
             password or os.environ.get("ACESTEP_API_PASS") or DEFAULT_ACESTEP_PASS
         )
+        self._client: httpx.AsyncClient | None = None
+        self._poller: _ResultPoller | None = None
+        # TTL caches for slow-changing server info: key → (fetched_at, value)
+        self._cache: dict[str, tuple[float, dict]] = {}
+        self._cache_locks: dict[str, asyncio.Lock] = {}
+        # Credentials are fixed for the client's lifetime, so encode them once
+        self._base_headers = self._build_headers()
+        self._json_body_headers = {
+            **self._base_headers,
+            "Content-Type": "application/json",
+        }
+
+    def _http(self) -> httpx.AsyncClient:
+        """Return the shared connection pool, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            # HTTP/2 multiplexes polls and downloads over one connection
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=30,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Stop result polling and close the pooled HTTP connections."""
+        if self._poller is not None:
+            self._poller.stop()
+            self._poller = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> AceStepClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
 
     def _headers(self) -> dict[str, str]:
+        """Request headers with auth and ngrok bypass (shared; do not mutate)."""
+        return self._base_headers
+
+    def _build_headers(self) -> dict[str, str]:
         """Build request headers with auth and ngrok bypass."""
         headers: dict[str, str] = {
             # Required for ngrok free-tier to bypass browser interstitial
@@ -297,6 +409,10 @@ class AceStepClient:
             headers["Authorization"] = f"Basic {creds}"
         return headers
 
+    def _json_headers(self) -> dict[str, str]:
+        """Request headers for an orjson-encoded JSON body (shared; do not mutate)."""
+        return self._json_body_headers
+
     # ── 1. Health Check ─────────────────────────────────
 
     async def health_check(self) -> bool:
@@ -305,15 +421,16 @@ class AceStepClient:
         GET /health → {"data": {"status": "ok", "service": "ACE-Step API", "version": "1.0"}, ...}
         """
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get(
-                    f"{self.base_url}/health",
-                    headers=self._headers(),
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                inner = data.get("data", data)
-                return inner.get("status") == "ok"
+            client = self._http()
+            resp = await client.get(
+                f"{self.base_url}/health",
+                headers=self._headers(),
+                timeout=10,
+            )
+            resp.raise_for_status()
+            data = orjson.loads(resp.content)
+            inner = data.get("data", data)
+            return inner.get("status") == "ok"
         except Exception as e:
             log.warning("ACE-Step health check failed: %s", e)
             return False
@@ -321,34 +438,56 @@ class AceStepClient:
     # ── 2. List Models ──────────────────────────────────
 
     async def list_models(self) -> dict:
-        """List available DiT models.
+        """List available DiT models (cached for ``MODELS_CACHE_TTL`` seconds).
 
         GET /v1/models → {"data": {"models": [...], "default_model": "..."}, ...}
         """
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(
-                f"{self.base_url}/v1/models",
-                headers=self._headers(),
-            )
-            resp.raise_for_status()
-            body = resp.json()
-            return body.get("data", body)
+        return await self._cached(
+            "models", MODELS_CACHE_TTL, lambda: self._get_data("/v1/models")
+        )
 
     # ── 3. Server Stats ─────────────────────────────────
 
     async def server_stats(self) -> dict:
         """Get server statistics (queue size, job counts, avg time).
 
+        Cached for ``STATS_CACHE_TTL`` seconds, so bursts of callers share one
+        request.
+
         GET /v1/stats → {"data": {"jobs": {...}, "queue_size": 0, ...}, ...}
         """
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(
-                f"{self.base_url}/v1/stats",
-                headers=self._headers(),
-            )
-            resp.raise_for_status()
-            body = resp.json()
-            return body.get("data", body)
+        return await self._cached(
+            "stats", STATS_CACHE_TTL, lambda: self._get_data("/v1/stats")
+        )
+
+    async def _get_data(self, path: str) -> dict:
+        """GET ``path`` and unwrap the ``data`` envelope."""
+        client = self._http()
+        resp = await client.get(
+            f"{self.base_url}{path}",
+            headers=self._headers(),
+            timeout=10,
+        )
+        resp.raise_for_status()
+        body = orjson.loads(resp.content)
+        return body.get("data", body)
+
+    async def _cached(
+        self, key: str, ttl: float, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """Return ``fetch()``'s result, reusing it for ``ttl`` seconds.
+
+        Callers arriving while a fetch is in flight wait for it rather than
+        issuing their own. Failures are not cached.
+        """
+        lock = self._cache_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            hit = self._cache.get(key)
+            if hit is not None and time.monotonic() - hit[0] < ttl:
+                return hit[1]
+            value = await fetch()
+            self._cache[key] = (time.monotonic(), value)
+            return value
 
     # ── 4. LM Understand Audio ──────────────────────────
 
@@ -364,25 +503,26 @@ class AceStepClient:
         path = Path(audio_path)
         mime = "audio/mpeg" if path.suffix.lower() == ".mp3" else "audio/*"
 
-        async with httpx.AsyncClient(timeout=120) as client:
-            with open(path, "rb") as f:
-                resp = await client.post(
-                    f"{self.base_url}/lm/understand",
-                    files={"audio": (path.name, f, mime)},
-                    data={"temperature": str(temperature)},
-                    headers=self._headers(),
-                )
-            resp.raise_for_status()
-            body = resp.json()
-            result = body.get("data", body)
-            log.info(
-                "ACE-Step /lm/understand: caption='%s', bpm=%s, key=%s, duration=%s",
-                str(result.get("caption", ""))[:80],
-                result.get("bpm"),
-                result.get("key_scale"),
-                result.get("duration"),
-            )
-            return result
+        content = await asyncio.to_thread(path.read_bytes)
+        client = self._http()
+        resp = await client.post(
+            f"{self.base_url}/lm/understand",
+            files={"audio": (path.name, content, mime)},
+            data={"temperature": str(temperature)},
+            headers=self._headers(),
+            timeout=120,
+        )
+        resp.raise_for_status()
+        body = orjson.loads(resp.content)
+        result = body.get("data", body)
+        log.info(
+            "ACE-Step /lm/understand: caption='%s', bpm=%s, key=%s, duration=%s",
+            str(result.get("caption", ""))[:80],
+            result.get("bpm"),
+            result.get("key_scale"),
+            result.get("duration"),
+        )
+        return result
 
     # ── 5. LM Inspire ──────────────────────────────────
 
@@ -409,22 +549,23 @@ class AceStepClient:
         if seed is not None:
             payload["seed"] = seed
 
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(
-                f"{self.base_url}/lm/inspire",
-                json=payload,
-                headers=self._headers(),
-            )
-            resp.raise_for_status()
-            body = resp.json()
-            result = body.get("data", body)
-            log.info(
-                "ACE-Step /lm/inspire: caption='%s', bpm=%s, key=%s",
-                str(result.get("caption", ""))[:80],
-                result.get("bpm"),
-                result.get("key_scale"),
-            )
-            return result
+        client = self._http()
+        resp = await client.post(
+            f"{self.base_url}/lm/inspire",
+            content=orjson.dumps(payload),
+            headers=self._json_headers(),
+            timeout=60,
+        )
+        resp.raise_for_status()
+        body = orjson.loads(resp.content)
+        result = body.get("data", body)
+        log.info(
+            "ACE-Step /lm/inspire: caption='%s', bpm=%s, key=%s",
+            str(result.get("caption", ""))[:80],
+            result.get("bpm"),
+            result.get("key_scale"),
+        )
+        return result
 
     # ── 6. LM Format ───────────────────────────────────
 
@@ -458,21 +599,22 @@ class AceStepClient:
         if duration is not None:
             payload["duration"] = duration
 
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(
-                f"{self.base_url}/lm/format",
-                json=payload,
-                headers=self._headers(),
-            )
-            resp.raise_for_status()
-            body = resp.json()
-            result = body.get("data", body)
-            log.info(
-                "ACE-Step /lm/format: caption='%s', bpm=%s",
-                str(result.get("caption", ""))[:80],
-                result.get("bpm"),
-            )
-            return result
+        client = self._http()
+        resp = await client.post(
+            f"{self.base_url}/lm/format",
+            content=orjson.dumps(payload),
+            headers=self._json_headers(),
+            timeout=60,
+        )
+        resp.raise_for_status()
+        body = orjson.loads(resp.content)
+        result = body.get("data", body)
+        log.info(
+            "ACE-Step /lm/format: caption='%s', bpm=%s",
+            str(result.get("caption", ""))[:80],
+            result.get("bpm"),
+        )
+        return result
 
     # ── 7–10. Task Submission ───────────────────────────
 
@@ -481,133 +623,73 @@ class AceStepClient:
 
         POST /release_task (JSON or multipart depending on audio uploads)
         """
-        # Pop internal file-path markers (not sent as params)
-        params = dict(params)  # shallow copy
-        src_audio_path = params.pop("_src_audio_path", None)
-        ref_audio_path = params.pop("_ref_audio_path", None)
-
-        async with httpx.AsyncClient(timeout=30) as client:
-            if src_audio_path or ref_audio_path:
-                # Multipart upload for repaint / style transfer
-                files_list: list[tuple[str, Any]] = []
-                data: dict[str, str] = {}
-
-                # Convert all params to form data strings
-                for k, v in params.items():
-                    if isinstance(v, bool):
-                        data[k] = str(v).lower()
-                    elif v is not None:
-                        data[k] = str(v)
-
-                opened_files = []
-                if src_audio_path:
-                    p = Path(src_audio_path)
-                    fh = open(p, "rb")
-                    opened_files.append(fh)
-                    files_list.append(("src_audio", (p.name, fh, "audio/mpeg")))
-                if ref_audio_path:
-                    p = Path(ref_audio_path)
-                    fh = open(p, "rb")
-                    opened_files.append(fh)
-                    files_list.append(("ref_audio", (p.name, fh, "audio/mpeg")))
-
-                try:
-                    resp = await client.post(
-                        f"{self.base_url}/release_task",
-                        files=files_list,
-                        data=data,
-                        headers=self._headers(),
-                    )
-                finally:
-                    for fh in opened_files:
-                        fh.close()
-            else:
-                # JSON body for standard generation
-                resp = await client.post(
-                    f"{self.base_url}/release_task",
-                    json=params,
-                    headers=self._headers(),
-                )
+        # Internal file-path markers, set only by repaint / style_transfer
+        src_audio_path = params.get("_src_audio_path")
+        ref_audio_path = params.get("_ref_audio_path")
+
+        client = self._http()
+        if src_audio_path or ref_audio_path:
+            # Multipart upload for repaint / style transfer. httpx renders
+            # bools as "true"/"false" and numbers via str(), so only unset
+            # values and the path markers need dropping.
+            files_list: list[tuple[str, Any]] = []
+            data = {
+                k: v
+                for k, v in params.items()
+                if v is not None and k not in _FILE_PATH_PARAMS
+            }
+
+            # Read uploads on a worker thread; a file handle here would make
+            # httpx do blocking reads on the event loop while encoding.
+            if src_audio_path:
+                p = Path(src_audio_path)
+                content = await asyncio.to_thread(p.read_bytes)
+                files_list.append(("src_audio", (p.name, content, "audio/mpeg")))
+            if ref_audio_path:
+                p = Path(ref_audio_path)
+                content = await asyncio.to_thread(p.read_bytes)
+                files_list.append(("ref_audio", (p.name, content, "audio/mpeg")))
 
-            resp.raise_for_status()
-            body = resp.json()
-            data_resp = body.get("data", body)
-            task_id = data_resp.get("task_id")
-            if not task_id:
-                raise ValueError(f"No task_id in response: {body}")
-            log.info(
-                "Submitted ACE-Step task %s (queue_position=%s)",
-                task_id,
-                data_resp.get("queue_position"),
+            resp = await client.post(
+                f"{self.base_url}/release_task",
+                files=files_list,
+                data=data,
+                headers=self._headers(),
+                timeout=30,
+            )
+        else:
+            # JSON body for standard generation
+            resp = await client.post(
+                f"{self.base_url}/release_task",
+                content=orjson.dumps(params),
+                headers=self._json_headers(),
+                timeout=30,
             )
-            return task_id
 
-    async def poll_result(
-        self,
-        task_id: str,
-        timeout: float = 600,
-        interval: float = 3.0,
-    ) -> dict:
-        """Poll /query_result until the task completes or fails.
+        resp.raise_for_status()
+        body = orjson.loads(resp.content)
+        data_resp = body.get("data", body)
+        task_id = data_resp.get("task_id")
+        if not task_id:
+            raise ValueError(f"No task_id in response: {body}")
+        log.info(
+            "Submitted ACE-Step task %s (queue_position=%s)",
+            task_id,
+            data_resp.get("queue_position"),
+        )
+        return task_id
+
+    async def poll_result(self, task_id: str, timeout: float = 600) -> dict:
+        """Wait for a submitted task to complete or fail.
+
+        Outstanding tasks of this client are polled together, one
+        /query_result request per round (see ``_ResultPoller``).
 
         Returns the parsed result dict for the first (and usually only) item.
         """
-        elapsed = 0.0
-        async with httpx.AsyncClient(timeout=30) as client:
-            while elapsed < timeout:
-                resp = await client.post(
-                    f"{self.base_url}/query_result",
-                    json={"task_id_list": [task_id]},
-                    headers=self._headers(),
-                )
-                resp.raise_for_status()
-                body = resp.json()
-                items = body.get("data", [])
-                if not items:
-                    await asyncio.sleep(interval)
-                    elapsed += interval
-                    continue
-
-                item = items[0]
-                status = item.get("status", 0)
-                progress = item.get("progress_text", "")
-                if progress:
-                    log.info("ACE-Step %s progress: %s", task_id, progress)
-
-                if status == 1:  # succeeded
-                    result_raw = item.get("result", "[]")
-                    if isinstance(result_raw, str):
-                        result_list = json.loads(result_raw)
-                    else:
-                        result_list = result_raw
-                    if not result_list:
-                        raise ValueError("ACE-Step returned empty result")
-                    return result_list[0]
-
-                if status == 2:  # failed
-                    result_raw = item.get("result", "[]")
-                    error_msg = "Unknown error"
-                    try:
-                        parsed = (
-                            json.loads(result_raw)
-                            if isinstance(result_raw, str)
-                            else result_raw
-                        )
-                        if (
-                            parsed
-                            and isinstance(parsed, list)
-                            and parsed[0].get("error")
-                        ):
-                            error_msg = parsed[0]["error"]
-                    except Exception:
-                        error_msg = str(result_raw)
-                    raise RuntimeError(f"ACE-Step generation failed: {error_msg}")
-
-                # status 0 → still running
-                await asyncio.sleep(interval)
-                elapsed += interval
-
-        raise TimeoutError(f"ACE-Step task {task_id} timed out after {timeout}s")
+        if self._poller is None:
+            self._poller = _ResultPoller(self)
+        return await self._poller.wait(task_id, timeout)
 
     # ── 12. Download Audio ──────────────────────────────
 
@@ -615,20 +697,85 @@ class AceStepClient:
         """Download an audio file from the ACE-Step /v1/audio endpoint.
 
         audio_url_path: relative path like "/v1/audio?path=..."
+
+        The body is streamed in 64 KiB chunks into a single buffer, so httpx
+        does not keep its own copy of the whole response alongside it. When
+        the server sends a Content-Length the buffer is allocated at that size
+        up front instead of growing as chunks arrive.
         """
         url = f"{self.base_url}{audio_url_path}"
-        async with httpx.AsyncClient(timeout=120) as client:
-            resp = await client.get(url, headers=self._headers())
+        client = self._http()
+        async with client.stream(
+            "GET", url, headers=self._headers(), timeout=120
+        ) as resp:
             resp.raise_for_status()
-            return resp.content
+            buf = bytearray(_content_length(resp))
+            offset = 0
+            async for chunk in resp.aiter_bytes(64 * 1024):
+                end = offset + len(chunk)
+                buf[offset:end] = chunk
+                offset = end
+        del buf[offset:]  # in case fewer bytes arrived than announced
+        return bytes(buf)
+
+    async def download_audio_to(self, audio_url_path: str, dest: str | Path) -> int:
+        """Stream an audio file from /v1/audio straight to ``dest``.
+
+        The response is written in 1 MiB chunks as it arrives, so the whole
+        track is never held in memory. When the server sends a Content-Length
+        the file is preallocated up front, so the filesystem can lay it out
+        in one extent. Returns the number of bytes written.
+
+        The body goes to a temp file next to ``dest`` that replaces it once
+        complete, so an existing ``dest`` (possibly a hard link shared with
+        other files) is never written into, and a failed download leaves no
+        partial file behind.
+        """
+        url = f"{self.base_url}{audio_url_path}"
+        dest = Path(dest)
+        tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.part")
+        size = 0
+        client = self._http()
+        try:
+            async with client.stream(
+                "GET", url, headers=self._headers(), timeout=120
+            ) as resp:
+                resp.raise_for_status()
+                expected = _content_length(resp)
+                async with aiofiles.open(tmp, "wb") as f:
+                    if expected and hasattr(os, "posix_fallocate"):
+                        try:
+                            await asyncio.to_thread(
+                                os.posix_fallocate, f.fileno(), 0, expected
+                            )
+                        except OSError:
+                            pass  # not supported by this filesystem
+                    async for chunk in resp.aiter_bytes(1 << 20):
+                        await f.write(chunk)
+                        size += len(chunk)
+                    if size != expected:
+                        await f.truncate(size)
+            os.replace(tmp, dest)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return size
 
     # ── High-Level Flows ────────────────────────────────
 
-    async def generate_music(self, params: dict) -> dict:
+    async def generate_music(
+        self, params: dict, out_path: str | Path | None = None
+    ) -> dict:
         """Full generation flow: submit → poll → download audio.
 
+        If ``out_path`` is given, the audio is streamed to that file instead of
+        being returned in memory.
+
+        Raises if the finished task has no audio file or its download fails,
+        so callers never report success without the audio.
+
         Returns dict with keys:
-            audio_bytes: bytes of the generated audio file
+            audio_bytes: bytes of the generated audio file (empty with out_path)
+            audio_size: number of audio bytes downloaded
             audio_format: str (e.g. "mp3")
             descriptions: dict with prompt, lyrics, metas, generation_info
         """
@@ -637,13 +784,20 @@ class AceStepClient:
 
         # Download audio
         audio_url = result.get("file", "")
+        if not audio_url:
+            raise ValueError(f"ACE-Step task {task_id} returned no audio file")
         audio_bytes = b""
-        if audio_url:
-            try:
+        try:
+            if out_path is not None:
+                # Leaves no partial file behind on failure
+                audio_size = await self.download_audio_to(audio_url, out_path)
+            else:
                 audio_bytes = await self.download_audio(audio_url)
-                log.info("Downloaded %d bytes of audio", len(audio_bytes))
-            except Exception as e:
-                log.error("Failed to download audio from %s: %s", audio_url, e)
+                audio_size = len(audio_bytes)
+        except Exception as e:
+            log.error("Failed to download audio from %s: %s", audio_url, e)
+            raise
+        log.info("Downloaded %d bytes of audio", audio_size)
 
         # Extract descriptions (the LM's low-level instructions)
         metas = result.get("metas", {})
@@ -664,6 +818,7 @@ class AceStepClient:
 
         return {
             "audio_bytes": audio_bytes,
+            "audio_size": audio_size,
             "audio_format": audio_format,
             "descriptions": descriptions,
         }
@@ -719,6 +874,7 @@ class AceStepClient:
         inference_steps: int = 8,
         batch_size: int = 1,
         audio_format: str = "mp3",
+        out_path: str | Path | None = None,
     ) -> dict:
         """Repaint/remix a section of existing audio (demo section 8).
 
@@ -734,7 +890,7 @@ class AceStepClient:
             "audio_format": audio_format,
             "_src_audio_path": str(src_audio_path),  # handled by submit_task
         }
-        return await self.generate_music(params)
+        return await self.generate_music(params, out_path)
 
     async def style_transfer(
         self,
@@ -746,6 +902,7 @@ class AceStepClient:
         inference_steps: int = 8,
         batch_size: int = 1,
         audio_format: str = "mp3",
+        out_path: str | Path | None = None,
     ) -> dict:
         """Style transfer using a reference audio (demo section 9).
 
@@ -762,4 +919,184 @@ class AceStepClient:
             "audio_format": audio_format,
             "_ref_audio_path": str(ref_audio_path),  # handled by submit_task
         }
-        return await self.generate_music(params)
+        return await self.generate_music(params, out_path)
+
+
+def _content_length(resp: httpx.Response) -> int:
+    """Announced body size of ``resp``, or 0 if absent or malformed."""
+    try:
+        return max(0, int(resp.headers.get("content-length", 0)))
+    except ValueError:
+        return 0
+
+
+def _task_result(item: dict) -> dict:
+    """Extract the first result of a finished /query_result item.
+
+    Raises RuntimeError if the task failed, ValueError if it has no result.
+    """
+    result_raw = item.get("result", "[]")
+    if item.get("status") == 2:  # failed
+        error_msg = "Unknown error"
+        try:
+            parsed = (
+                orjson.loads(result_raw) if isinstance(result_raw, str) else result_raw
+            )
+            if parsed and isinstance(parsed, list) and parsed[0].get("error"):
+                error_msg = parsed[0]["error"]
+        except Exception:
+            error_msg = str(result_raw)
+        raise RuntimeError(f"ACE-Step generation failed: {error_msg}")
+
+    result_list = (
+        orjson.loads(result_raw) if isinstance(result_raw, str) else result_raw
+    )
+    if not result_list:
+        raise ValueError("ACE-Step returned empty result")
+    return result_list[0]
+
+
+class _ResultPoller:
+    """Polls /query_result on behalf of every task a client is waiting on.
+
+    A single background loop sends all outstanding task ids in one
+    ``task_id_list`` per round, so N concurrent generations cost one request
+    per interval rather than N. Rounds start ``POLL_INTERVAL`` seconds apart
+    and back off by 1.5x (with +/-20% jitter) up to ``POLL_MAX_INTERVAL``;
+    the delay resets when a task reports new progress or a new task joins.
+
+    A request error names no task, so a failed batch is split and each task
+    re-polled on its own; only a task whose own polls fail
+    ``POLL_MAX_FAILURES`` rounds in a row is failed, with the last error.
+    """
+
+    def __init__(self, client: AceStepClient) -> None:
+        self._client = client
+        self._pending: dict[str, asyncio.Future[dict]] = {}
+        self._progress: dict[str, str] = {}
+        self._failures: dict[str, int] = {}
+        self._delay = POLL_INTERVAL
+        self._task: asyncio.Task | None = None
+
+    async def wait(self, task_id: str, timeout: float) -> dict:
+        """Resolve with the task's result once /query_result reports it done."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending[task_id] = future
+        self._delay = POLL_INTERVAL
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except TimeoutError:
+            raise TimeoutError(
+                f"ACE-Step task {task_id} timed out after {timeout}s"
+            ) from None
+        finally:
+            if self._pending.get(task_id) is future:
+                del self._pending[task_id]
+            self._progress.pop(task_id, None)
+            self._failures.pop(task_id, None)
+
+    def stop(self) -> None:
+        """Cancel the polling loop; waiters are left to their own timeouts."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while self._pending:
+            progressed = await self._poll_round(list(self._pending))
+            if progressed:
+                self._delay = POLL_INTERVAL
+            pause = self._delay * (0.8 + 0.4 * random.random())
+            self._delay = min(self._delay * 1.5, POLL_MAX_INTERVAL)
+            await asyncio.sleep(pause)
+
+    async def _poll_round(self, task_ids: list[str]) -> bool:
+        """Poll ``task_ids`` together, falling back to one request per task.
+
+        Returns True if any task reported new progress.
+        """
+        try:
+            progressed = await self._poll_once(task_ids)
+        except Exception as e:
+            if len(task_ids) == 1:
+                self._record_failure(task_ids[0], e)
+                return False
+        else:
+            for task_id in task_ids:
+                self._failures.pop(task_id, None)
+            return progressed
+
+        # Split the batch so an error stays with the task that causes it
+        results = await asyncio.gather(
+            *(self._poll_once([task_id]) for task_id in task_ids),
+            return_exceptions=True,
+        )
+        progressed = False
+        for task_id, result in zip(task_ids, results, strict=True):
+            if isinstance(result, Exception):
+                self._record_failure(task_id, result)
+            else:
+                self._failures.pop(task_id, None)
+                progressed = progressed or result
+        return progressed
+
+    def _record_failure(self, task_id: str, error: Exception) -> None:
+        """Count a failed poll of ``task_id``; fail its waiter after too many."""
+        failures = self._failures.get(task_id, 0) + 1
+        if failures < POLL_MAX_FAILURES:
+            self._failures[task_id] = failures
+            log.warning(
+                "Polling ACE-Step task %s failed (%d/%d): %s",
+                task_id,
+                failures,
+                POLL_MAX_FAILURES,
+                error,
+            )
+            return
+        self._failures.pop(task_id, None)
+        future = self._pending.pop(task_id, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
+
+    async def _poll_once(self, task_ids: list[str]) -> bool:
+        """Query ``task_ids`` once and resolve finished tasks.
+
+        Returns True if any task reported new progress.
+        """
+        client = self._client
+        resp = await client._http().post(
+            f"{client.base_url}/query_result",
+            content=orjson.dumps({"task_id_list": task_ids}),
+            headers=client._json_headers(),
+            timeout=30,
+        )
+        resp.raise_for_status()
+        items = orjson.loads(resp.content).get("data") or []
+
+        progressed = False
+        for i, item in enumerate(items):
+            # Items echo their task_id; otherwise they follow request order
+            task_id = item.get("task_id") or (
+                task_ids[i] if i < len(task_ids) else None
+            )
+            future = self._pending.get(task_id)
+            if future is None:
+                continue
+
+            progress = item.get("progress_text", "")
+            if progress and progress != self._progress.get(task_id):
+                log.info("ACE-Step %s progress: %s", task_id, progress)
+                self._progress[task_id] = progress
+                progressed = True
+
+            if item.get("status", 0) in (1, 2):  # succeeded / failed
+                del self._pending[task_id]
+                if future.done():
+                    continue
+                try:
+                    future.set_result(_task_result(item))
+                except Exception as e:
+                    future.set_exception(e)
+        return progressed
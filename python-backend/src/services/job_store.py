@@ -0,0 +1,216 @@
+"""Job status storage for the background generation pipeline.
+
+Every job moves through a small state machine::
+
+    processing ──► completed
+         └───────► failed
+
+Two backends are provided:
+
+  * ``MemoryJobStore`` — process-local, with TTL eviction so finished jobs do
+    not accumulate in the heap. Fine for a single uvicorn worker.
+  * ``RedisJobStore`` — shared across workers. Each job is a Redis hash
+    (``job:<id>`` → status/result/error) with an expiry, so transitions only
+    rewrite the fields that changed and dead jobs are reclaimed by Redis.
+
+``create_job_store()`` picks Redis when ``REDIS_URL`` is set.
+
+Both backends support ``watch(job_id)``, an async iterator that yields the
+job each time it changes, so status can be pushed to clients instead of
+polled.
+
+Store methods are coroutines and must be awaited on the event loop; the
+Redis backend talks to the server through ``redis.asyncio``, so no call
+blocks the loop on a network round trip.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Optional, Protocol
+
+import orjson
+
+# How long a job's status stays queryable after its last update
+DEFAULT_JOB_TTL_SECONDS = 3600
+
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobStore(Protocol):
+    """Interface shared by the job store backends."""
+
+    ttl_seconds: float
+
+    async def get(self, job_id: str) -> Optional[dict]: ...
+
+    async def update(self, job_id: str, **fields: Any) -> None: ...
+
+    def watch(self, job_id: str) -> AsyncIterator[Optional[dict]]: ...
+
+    async def start(self, job_id: str) -> None: ...
+
+    async def complete(self, job_id: str, result: Any) -> None: ...
+
+    async def fail(self, job_id: str, error: str) -> None: ...
+
+    async def aclose(self) -> None: ...
+
+
+class _LifecycleMixin:
+    """State transitions expressed in terms of ``update``."""
+
+    async def start(self, job_id: str) -> None:
+        await self.update(job_id, status=PROCESSING, result=None, error=None)
+
+    async def complete(self, job_id: str, result: Any) -> None:
+        await self.update(job_id, status=COMPLETED, result=result, error=None)
+
+    async def fail(self, job_id: str, error: str) -> None:
+        await self.update(job_id, status=FAILED, result=None, error=error)
+
+
+class MemoryJobStore(_LifecycleMixin):
+    """In-process job store with TTL-based eviction.
+
+    Entries are kept in last-updated order, so expired jobs are always at the
+    front of the dict and the sweep on each write stops at the first live one.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_JOB_TTL_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._jobs: dict[str, tuple[float, dict]] = {}
+        # Per-job change notifications for watch()
+        self._watchers: dict[str, list[asyncio.Event]] = {}
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return self._get(job_id)
+
+    def _get(self, job_id: str) -> Optional[dict]:
+        entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+        expires_at, job = entry
+        if expires_at <= time.monotonic():
+            del self._jobs[job_id]
+            return None
+        return dict(job)
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        now = time.monotonic()
+        entry = self._jobs.pop(job_id, None)
+        if entry is None:
+            job = {"status": PROCESSING, "result": None, "error": None}
+        else:
+            job = entry[1]
+        job.update(fields)
+        self._jobs[job_id] = (now + self.ttl_seconds, job)
+        self._evict_expired(now)
+        for changed in self._watchers.get(job_id, ()):
+            changed.set()
+
+    async def watch(self, job_id: str) -> AsyncIterator[Optional[dict]]:
+        """Yield the current job, then the job again after every update."""
+        changed = asyncio.Event()
+        self._watchers.setdefault(job_id, []).append(changed)
+        try:
+            while True:
+                changed.clear()
+                yield self._get(job_id)
+                await changed.wait()
+        finally:
+            waiters = self._watchers.get(job_id, [])
+            waiters.remove(changed)
+            if not waiters:
+                self._watchers.pop(job_id, None)
+
+    async def aclose(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _evict_expired(self, now: float) -> None:
+        while self._jobs:
+            job_id = next(iter(self._jobs))
+            if self._jobs[job_id][0] > now:
+                break
+            del self._jobs[job_id]
+
+
+class RedisJobStore(_LifecycleMixin):
+    """Job store backed by Redis hashes, shared between uvicorn workers.
+
+    Field values are JSON-encoded (orjson) so ``result`` round-trips as a dict.
+    Requires the optional ``redis`` dependency (``pip install hacknation26[redis]``).
+    The ``redis.asyncio`` client opens its connections lazily, on the event
+    loop that first uses the store.
+    """
+
+    def __init__(
+        self, url: str, ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS, prefix: str = "job:"
+    ) -> None:
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError(
+                "REDIS_URL is set but the 'redis' package is not installed"
+            ) from e
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        raw = await self._redis.hgetall(self.prefix + job_id)
+        if not raw:
+            return None
+        return {k.decode(): orjson.loads(v) for k, v in raw.items()}
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        key = self.prefix + job_id
+        pipe = self._redis.pipeline()
+        pipe.hset(key, mapping={k: orjson.dumps(v) for k, v in fields.items()})
+        pipe.expire(key, self.ttl_seconds)
+        pipe.publish(self._channel(job_id), fields.get("status", ""))
+        await pipe.execute()
+
+    async def watch(self, job_id: str) -> AsyncIterator[Optional[dict]]:
+        """Yield the current job, then the job again after every update.
+
+        Updates are announced on the ``job_events:<id>`` pub/sub channel, so
+        changes made by any worker are seen. The subscription is read with
+        the async client, so a watcher holds a connection but no thread.
+        """
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self._channel(job_id))
+        messages = pubsub.listen()
+        try:
+            while True:
+                yield await self.get(job_id)
+                await anext(messages)
+        finally:
+            await pubsub.aclose()
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
+
+    @staticmethod
+    def _channel(job_id: str) -> str:
+        return f"job_events:{job_id}"
+
+
+def create_job_store() -> JobStore:
+    """Build the job store selected by the environment.
+
+    ``REDIS_URL`` switches to ``RedisJobStore``; ``JOB_TTL_SECONDS`` sets how
+    long finished jobs remain queryable (default: 3600).
+    """
+    ttl = int(os.getenv("JOB_TTL_SECONDS", str(DEFAULT_JOB_TTL_SECONDS)))
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisJobStore(redis_url, ttl_seconds=ttl)
+    return MemoryJobStore(ttl_seconds=ttl)
@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+from src.services import ace_step_client
+from src.services.ace_step_client import AceStepClient
+
+
+def _done(task_id: str) -> dict:
+    """A /query_result item for a task that succeeded."""
+    result = [{"file": f"/v1/audio?path={task_id}.mp3"}]
+    return {"task_id": task_id, "status": 1, "result": orjson.dumps(result).decode()}
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(ace_step_client, "POLL_INTERVAL", 0.001)
+    monkeypatch.setattr(ace_step_client, "POLL_MAX_INTERVAL", 0.001)
+
+
+def _client(handler) -> AceStepClient:
+    """An AceStepClient whose /query_result calls go to ``handler(task_ids)``."""
+
+    def transport(request: httpx.Request) -> httpx.Response:
+        task_ids = orjson.loads(request.content)["task_id_list"]
+        return handler(task_ids)
+
+    client = AceStepClient(base_url="http://ace")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(transport))
+    return client
+
+
+class TestResultPoller:
+    @pytest.mark.asyncio
+    async def test_outstanding_tasks_share_one_request(self):
+        batches = []
+
+        def handler(task_ids):
+            batches.append(task_ids)
+            return httpx.Response(200, json={"data": [_done(t) for t in task_ids]})
+
+        async with _client(handler) as client:
+            a, b = await asyncio.gather(
+                client.poll_result("a"), client.poll_result("b")
+            )
+
+        assert a["file"].endswith("a.mp3") and b["file"].endswith("b.mp3")
+        assert batches == [["a", "b"]]
+
+    @pytest.mark.asyncio
+    async def test_transient_error_is_retried(self):
+        responses = [httpx.Response(502), httpx.Response(502)]
+
+        def handler(task_ids):
+            if responses:
+                return responses.pop()
+            return httpx.Response(200, json={"data": [_done(t) for t in task_ids]})
+
+        async with _client(handler) as client:
+            result = await client.poll_result("a")
+        assert result["file"].endswith("a.mp3")
+
+    @pytest.mark.asyncio
+    async def test_failing_task_does_not_fail_the_others(self):
+        """A task that breaks the batched request is isolated and failed on
+        its own; the other jobs in the round still complete."""
+        polls_of_bad = []
+
+        def handler(task_ids):
+            if "bad" in task_ids:
+                polls_of_bad.append(task_ids)
+                return httpx.Response(500)
+            return httpx.Response(200, json={"data": [_done(t) for t in task_ids]})
+
+        async with _client(handler) as client:
+            good, bad = await asyncio.gather(
+                client.poll_result("good"),
+                client.poll_result("bad"),
+                return_exceptions=True,
+            )
+
+        assert good["file"].endswith("good.mp3")
+        assert isinstance(bad, httpx.HTTPStatusError)
+        solo_polls = [ids for ids in polls_of_bad if ids == ["bad"]]
+        assert len(solo_polls) == ace_step_client.POLL_MAX_FAILURES
+
+    @pytest.mark.asyncio
+    async def test_failed_generation_only_fails_its_task(self):
+        def handler(task_ids):
+            items = [_done("ok"), {"task_id": "broken", "status": 2, "result": "[]"}]
+            return httpx.Response(200, json={"data": items})
+
+        async with _client(handler) as client:
+            ok, broken = await asyncio.gather(
+                client.poll_result("ok"),
+                client.poll_result("broken"),
+                return_exceptions=True,
+            )
+
+        assert ok["file"].endswith("ok.mp3")
+        assert isinstance(broken, RuntimeError)
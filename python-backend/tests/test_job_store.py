@@ -0,0 +1,70 @@
+import pytest
+
+from src.services.job_store import MemoryJobStore
+
+
+class TestMemoryJobStore:
+    @pytest.mark.asyncio
+    async def test_lifecycle(self):
+        """Jobs move from processing to completed with their result."""
+        store = MemoryJobStore()
+        await store.start("a")
+        assert await store.get("a") == {
+            "status": "processing",
+            "result": None,
+            "error": None,
+        }
+
+        await store.complete("a", {"audio_url": "/api/audio/a"})
+        job = await store.get("a")
+        assert job["status"] == "completed"
+        assert job["result"] == {"audio_url": "/api/audio/a"}
+
+    @pytest.mark.asyncio
+    async def test_failure_records_error(self):
+        store = MemoryJobStore()
+        await store.start("a")
+        await store.fail("a", "boom")
+        assert await store.get("a") == {
+            "status": "failed",
+            "result": None,
+            "error": "boom",
+        }
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self):
+        assert await MemoryJobStore().get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_expired_jobs_are_evicted(self, monkeypatch):
+        """Finished jobs are dropped once their TTL has passed."""
+        now = [1000.0]
+        monkeypatch.setattr("src.services.job_store.time.monotonic", lambda: now[0])
+        store = MemoryJobStore(ttl_seconds=10)
+        await store.complete("old", {})
+        now[0] += 5
+        await store.complete("new", {})
+
+        now[0] += 6
+        assert await store.get("old") is None
+        assert await store.get("new") is not None
+
+        # A write sweeps expired entries even if they are never read again
+        await store.complete("older", {})
+        now[0] += 11
+        await store.start("fresh")
+        assert len(store) == 1
+
+    @pytest.mark.asyncio
+    async def test_watch_yields_on_each_update(self):
+        """watch() yields the current job, then again after every update."""
+        store = MemoryJobStore()
+        await store.start("a")
+        updates = store.watch("a")
+        assert (await anext(updates))["status"] == "processing"
+
+        await store.complete("a", {})
+        assert (await anext(updates))["status"] == "completed"
+
+        await updates.aclose()
+        assert store._watchers == {}
@@ -0,0 +1,18 @@
+from src.agent import music_agent
+
+
+class TestClientReuse:
+    def test_changed_key_closes_the_previous_client(self, monkeypatch):
+        monkeypatch.setenv("OPENROUTER_API_KEY", "first")
+        first = music_agent._make_client()
+        assert music_agent._make_client() is first
+
+        monkeypatch.setenv("OPENROUTER_API_KEY", "second")
+        second = music_agent._make_client()
+        assert second is not first
+        assert first.is_closed()
+
+        music_agent.close_client()
+        assert second.is_closed()
+        assert music_agent._make_client() is not second
+        music_agent.close_client()
@@ -0,0 +1,321 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+
+import httpx
+import orjson
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from src.api import routes
+from src.services.ace_step_client import AceStepClient
+
+# Starlette keeps uploads up to 1 MiB in memory before spilling them to disk
+SPOOLED_UPLOAD_BYTES = 2 * 1024 * 1024
+
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    """Point the routes' upload, reference and cache dirs at a fresh tmp dir."""
+    monkeypatch.setattr(routes, "TEMP_DIR", tmp_path)
+    for name in ("REFS_DIR", "ACE_CACHE_DIR"):
+        path = tmp_path / name.lower()
+        path.mkdir()
+        monkeypatch.setattr(routes, name, path)
+    return tmp_path
+
+
+@pytest.fixture
+def spawned(monkeypatch):
+    """Record background jobs instead of running them."""
+    calls = []
+    monkeypatch.setattr(routes, "_spawn_job", lambda func, *args: calls.append(args))
+    return calls
+
+
+@pytest.fixture
+def client(temp_dir, spawned):
+    with TestClient(routes.create_app()) as c:
+        yield c
+
+
+def _job_dirs(temp_dir):
+    shared = ("refs_dir", "ace_cache_dir")
+    return [p for p in temp_dir.iterdir() if p.name not in shared]
+
+
+class TestUploads:
+    @pytest.mark.parametrize(
+        "filename", ["../../escape.jpg", "..\\..\\escape.jpg", "/etc/escape.jpg"]
+    )
+    def test_traversal_filename_stays_in_job_dir(
+        self, client, temp_dir, spawned, filename
+    ):
+        resp = client.post(
+            "/api/generate", files={"files": (filename, b"jpeg", "image/jpeg")}
+        )
+        assert resp.status_code == 200
+
+        job_id, file_paths = spawned[0][:2]
+        assert file_paths == [str(temp_dir / job_id / "escape.jpg")]
+        assert (temp_dir / job_id / "escape.jpg").read_bytes() == b"jpeg"
+        assert not (temp_dir.parent / "escape.jpg").exists()
+
+    def test_colliding_filenames_get_their_own_files(
+        self, client, temp_dir, spawned
+    ):
+        """Names that sanitize alike are written to distinct files, whole."""
+        first, second = b"A" * 300_000, b"B" * 300_000
+        resp = client.post(
+            "/api/generate",
+            files=[
+                ("files", ("a/x.png", first, "image/png")),
+                ("files", ("b/x.png", second, "image/png")),
+                ("files", ("x.png", b"C", "image/png")),
+            ],
+        )
+        assert resp.status_code == 200
+
+        job_id, file_paths = spawned[0][:2]
+        job_dir = temp_dir / job_id
+        assert file_paths == [
+            str(job_dir / "x.png"),
+            str(job_dir / "x-1.png"),
+            str(job_dir / "x-2.png"),
+        ]
+        contents = [Path(p).read_bytes() for p in file_paths]
+        assert contents == [first, second, b"C"]
+
+    def test_invalid_filename_is_rejected(self, client, temp_dir):
+        resp = client.post(
+            "/api/generate", files={"files": ("..", b"jpeg", "image/jpeg")}
+        )
+        assert resp.status_code == 400
+        assert _job_dirs(temp_dir) == []
+
+    @pytest.mark.parametrize("size", [64, SPOOLED_UPLOAD_BYTES])
+    def test_oversize_upload_returns_413(
+        self, client, temp_dir, spawned, monkeypatch, size
+    ):
+        """Both the in-memory (chunked copy) and spooled-to-disk (sendfile)
+        paths reject the upload and leave nothing behind."""
+        monkeypatch.setattr(routes, "MAX_UPLOAD_BYTES", size - 1)
+        resp = client.post(
+            "/api/generate", files={"files": ("big.mp4", b"\0" * size, "video/mp4")}
+        )
+        assert resp.status_code == 413
+        assert _job_dirs(temp_dir) == []
+        assert spawned == []
+
+    def test_spooled_upload_is_copied_intact(self, client, spawned, monkeypatch):
+        """Uploads spilled to disk are copied with sendfile, byte for byte."""
+        copies = []
+        sendfile_copy = routes._sendfile_copy
+        monkeypatch.setattr(
+            routes,
+            "_sendfile_copy",
+            lambda *args: copies.append(args) or sendfile_copy(*args),
+        )
+        data = bytes(range(256)) * (SPOOLED_UPLOAD_BYTES // 256)
+        resp = client.post(
+            "/api/generate", files={"files": ("clip.mp4", data, "video/mp4")}
+        )
+        assert resp.status_code == 200
+        assert len(copies) == 1
+        (path,) = spawned[0][1]
+        with open(path, "rb") as f:
+            assert f.read() == data
+
+
+class TestSharedAudioFiles:
+    """Cached outputs and deduplicated references are hard links shared
+    between jobs, so writing one job's file must never change another's."""
+
+    def test_storing_a_cached_key_twice_keeps_both_outputs(self, temp_dir):
+        first = temp_dir / "job1" / "output.mp3"
+        second = temp_dir / "job2" / "output.mp3"
+        for path, audio in ((first, b"SONG-ONE"), (second, b"SONG-TWO")):
+            path.parent.mkdir()
+            path.write_bytes(audio)
+
+        routes._store_cached_music("k", first, {"descriptions": {"n": 1}})
+        routes._store_cached_music("k", second, {"descriptions": {"n": 2}})
+
+        assert first.read_bytes() == b"SONG-ONE"
+        assert second.read_bytes() == b"SONG-TWO"
+        reused = temp_dir / "job3" / "output.mp3"
+        reused.parent.mkdir()
+        assert routes._load_cached_music("k", reused) == {"descriptions": {"n": 1}}
+        assert reused.read_bytes() == b"SONG-ONE"
+
+    def test_copy_fallback_replaces_instead_of_writing_through(
+        self, temp_dir, monkeypatch
+    ):
+        src = temp_dir / "src.mp3"
+        src.write_bytes(b"NEW")
+        shared = temp_dir / "shared.mp3"
+        shared.write_bytes(b"OLD")
+        dest = temp_dir / "dest.mp3"
+        dest.hardlink_to(shared)
+
+        def cross_device(*args):
+            raise OSError(18, "Invalid cross-device link")
+
+        monkeypatch.setattr(routes.os, "link", cross_device)
+        routes._link_or_copy(src, dest)
+        assert dest.read_bytes() == b"NEW"
+        assert shared.read_bytes() == b"OLD"
+
+    @pytest.mark.asyncio
+    async def test_reference_named_like_the_output_is_not_overwritten(
+        self, temp_dir, spawned
+    ):
+        async def upload_reference() -> str:
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as c:
+                resp = await c.post(
+                    "/api/generate-music",
+                    data={"vibe_tree": "{}"},
+                    files={"reference_audio": ("output.mp3", b"REFERENCE")},
+                )
+            assert resp.status_code == 200
+            return spawned[-1][3]
+
+        app = routes.create_app()
+        app.state.ace = None  # not used while jobs are only recorded
+        ref_path = Path(await upload_reference())
+        assert ref_path.name != "output.mp3"
+
+        # Generate into the job's output.mp3 the way the ACE-Step job does
+        ace = AceStepClient(base_url="http://ace")
+        ace._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=b"GENERATED")
+            )
+        )
+        async with ace:
+            await ace.download_audio_to("/v1/audio", ref_path.parent / "output.mp3")
+
+        (stored,) = routes.REFS_DIR.iterdir()
+        assert stored.read_bytes() == b"REFERENCE"
+        assert ref_path.read_bytes() == b"REFERENCE"
+        assert Path(await upload_reference()).read_bytes() == b"REFERENCE"
+
+    @pytest.mark.asyncio
+    async def test_download_replaces_a_hard_linked_destination(self, temp_dir):
+        shared = temp_dir / "shared.mp3"
+        shared.write_bytes(b"SHARED")
+        dest = temp_dir / "output.mp3"
+        dest.hardlink_to(shared)
+
+        ace = AceStepClient(base_url="http://ace")
+        ace._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=b"GENERATED")
+            )
+        )
+        async with ace:
+            size = await ace.download_audio_to("/v1/audio", dest)
+
+        assert size == len(b"GENERATED")
+        assert dest.read_bytes() == b"GENERATED"
+        assert shared.read_bytes() == b"SHARED"
+
+
+def _age(path: Path, seconds: float) -> None:
+    """Backdate ``path``'s mtime by ``seconds``."""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+class TestSweep:
+    @pytest.mark.asyncio
+    async def test_cache_hit_output_survives_the_sweep(self, temp_dir, monkeypatch):
+        """A hard link shares the cache entry's old mtime; a hit must still
+        count as fresh audio and renew the entry."""
+        monkeypatch.setattr(routes, "AUDIO_RETENTION_SECONDS", 3600)
+        source = temp_dir / "job1" / "output.mp3"
+        source.parent.mkdir()
+        source.write_bytes(b"SONG")
+        routes._store_cached_music("k", source, {"descriptions": {}})
+        for path in (source, *routes.ACE_CACHE_DIR.iterdir()):
+            _age(path, 2 * 3600)
+
+        (temp_dir / "job2").mkdir()
+        await routes.jobs.start("job2")
+        await routes._run_music_generation("job2", None, {}, None, 30, "k")
+        assert (await routes.jobs.get("job2"))["status"] == "completed"
+
+        routes._sweep_temp_dir()
+        assert (temp_dir / "job2" / "output.mp3").read_bytes() == b"SONG"
+        assert routes._load_cached_music("k", temp_dir / "job3.mp3") is not None
+
+    def test_reused_reference_survives_the_sweep(self, client, temp_dir, spawned):
+        """A reused reference links an old REFS_DIR entry into the new job;
+        neither may be swept while the new job still needs it."""
+
+        def upload_reference() -> Path:
+            resp = client.post(
+                "/api/ace-step/style-transfer",
+                data={"prompt": "lofi"},
+                files={"ref_audio": ("ref.mp3", b"REFERENCE")},
+            )
+            assert resp.status_code == 200
+            return Path(spawned[-1][2])
+
+        first = upload_reference()
+        (stored,) = routes.REFS_DIR.iterdir()
+        for path in (first, first.parent, stored):
+            _age(path, 2 * routes.jobs.ttl_seconds)
+
+        second = upload_reference()
+        routes._sweep_temp_dir()
+        assert stored.read_bytes() == b"REFERENCE"
+        assert second.read_bytes() == b"REFERENCE"
+
+
+class TestBackgroundJobs:
+    @pytest.mark.asyncio
+    async def test_job_cancelled_while_queued_is_marked_failed(self, monkeypatch):
+        monkeypatch.setattr(routes, "_generation_slots", asyncio.Semaphore(0))
+        ran = []
+
+        async def job(job_id):
+            ran.append(job_id)
+
+        await routes.jobs.start("queued")
+        routes._spawn_job(job, "queued")
+        (task,) = routes._background_jobs
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert ran == []
+        job_status = await routes.jobs.get("queued")
+        assert job_status["status"] == "failed"
+        assert "shut down" in job_status["error"]
+
+
+class TestStatusWebSocket:
+    def test_unknown_job_is_closed_with_4404(self, client):
+        with client.websocket_connect("/api/ws/status/missing") as ws:
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_text()
+        assert closed.value.code == 4404
+
+    def test_client_disconnect_releases_the_watcher(self, client):
+        """A client leaving a job that never changes is noticed at once."""
+        client.portal.call(routes.jobs.start, "stuck")
+        with client.websocket_connect("/api/ws/status/stuck") as ws:
+            assert orjson.loads(ws.receive_text())["status"] == "processing"
+            assert "stuck" in routes.jobs._watchers
+            ws.close()
+            # The server is still running; it must drop the watcher by itself
+            deadline = time.monotonic() + 2
+            while "stuck" in routes.jobs._watchers and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert "stuck" not in routes.jobs._watchers
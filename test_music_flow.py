@@ -7,6 +7,8 @@ Tests:
 """
 
 import json
+import logging
+import os
 import sys
 from pathlib import Path
 
@@ -16,6 +18,11 @@ sys.path.insert(0, str(Path(__file__).parent / "python-backend"))
 from src.models.song_tree import SongCharacteristics, SongNode
 from src.services.ace_step_client import vibe_tree_to_ace_step_params
 
+log = logging.getLogger(__name__)
+
+# Tags, genre, mood and instrument that must survive into the prompt
+REQUIRED_PROMPT_TERMS = ("cinematic", "emotional", "ambient", "melancholic", "piano")
+
 
 def test_vibetree_to_ace_params():
     """Test that VibeTree is properly converted to ACE-Step params."""
@@ -63,41 +70,40 @@ def test_vibetree_to_ace_params():
     assert "prompt" in params, "Missing prompt in ACE-Step params"
     assert "lyrics" in params, "Missing lyrics in ACE-Step params"
     
-    # Verify prompt contains tags from VibeTree
+    # Verify prompt contains tags, genre, mood and instrument from VibeTree
     prompt = params["prompt"]
-    assert "cinematic" in prompt.lower(), "cinematic tag missing from prompt"
-    assert "emotional" in prompt.lower(), "emotional tag missing from prompt"
-    assert "ambient" in prompt.lower(), "genre missing from prompt"
-    assert "melancholic" in prompt.lower(), "mood missing from prompt"
-    assert "piano" in prompt.lower(), "instrument missing from prompt"
+    prompt_lower = prompt.lower()
+    missing = [t for t in REQUIRED_PROMPT_TERMS if t not in prompt_lower]
+    assert not missing, f"Missing from prompt: {missing}"
     
     # Verify lyrics contain section structure
     lyrics = params["lyrics"]
     assert "[Intro]" in lyrics, "Section marker missing from lyrics"
-    assert "delicate piano" in lyrics.lower() or "piano" in lyrics.lower(), "Instrument details missing from lyrics"
+    assert "piano" in lyrics.lower(), "Instrument details missing from lyrics"
     
     # Verify metadata
     assert params.get("bpm") == 60, "BPM not properly extracted"
     assert params.get("key_scale") == "A minor", "Key not properly extracted"
     assert params.get("audio_duration") == 120.0, "Duration not properly extracted"
     
-    print("✓ All VibeTree to ACE-Step conversion tests passed")
-    print(f"  Prompt: {prompt}")
-    print(f"  BPM: {params.get('bpm')}")
-    print(f"  Key: {params.get('key_scale')}")
+    log.info("✓ All VibeTree to ACE-Step conversion tests passed")
+    log.info("  Prompt: %s", prompt)
+    log.info("  BPM: %s", params.get("bpm"))
+    log.info("  Key: %s", params.get("key_scale"))
     return True
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv("LOGLEVEL", "INFO"), format="%(message)s", stream=sys.stdout
+    )
     try:
         test_vibetree_to_ace_params()
-        print("\n✓ All tests passed!")
+        log.info("\n✓ All tests passed!")
         sys.exit(0)
     except AssertionError as e:
-        print(f"✗ Test failed: {e}")
+        log.error("✗ Test failed: %s", e)
         sys.exit(1)
     except Exception as e:
-        print(f"✗ Unexpected error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("✗ Unexpected error: %s", e)
         sys.exit(1)
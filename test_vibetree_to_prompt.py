@@ -4,11 +4,20 @@ Test script to generate a music prompt from a vibetree structure using Claude.
 This demonstrates the JSON-to-LLM workflow for creating music generation prompts.
 """
 
-import json
+import asyncio
+import hashlib
+import logging
 import os
+import random
 import sys
+from operator import itemgetter
 from pathlib import Path
 
+import httpx
+import orjson
+
+log = logging.getLogger(__name__)
+
 # Example vibetree structure
 EXAMPLE_VIBETREE = {
     "root": {
@@ -109,34 +118,38 @@ EXAMPLE_VIBETREE = {
 }
 
 
-def vibetree_to_json(vibetree: dict) -> dict:
-    """Convert vibetree to JSON structure for LLM processing."""
-    root = vibetree["root"]
-    return {
-        "concept": root["concept"],
-        "image_interpretation": root.get("image_interpretation"),
-        "overall_arc": root["global"].get("overall_arc"),
-        "duration_seconds": root["global"].get("duration_seconds"),
-        "tags": root["global"].get("tags", []),
-        "sections": [
-            {
-                "name": section["name"],
-                "weight": section["weight"],
-                "branches": section["branches"],
-            }
-            for section in root["sections"]
-        ],
-    }
+ANTHROPIC_MESSAGES_URL = "https://api.anthropic.com/v1/messages"
+CLAUDE_MODEL = "claude-3-5-sonnet-20241022"
 
+# Over HTTP/2 concurrent requests share a connection as streams, so the pool
+# rarely grows; reads allow for slow generations between streamed chunks
+HTTP_LIMITS = httpx.Limits(
+    max_connections=64, max_keepalive_connections=32, keepalive_expiry=30.0
+)
+HTTP_TIMEOUT = httpx.Timeout(connect=5.0, read=60.0, write=10.0, pool=5.0)
 
-def generate_music_prompt_from_vibetree(vibetree_json: dict, api_key: str) -> str:
-    """
-    Send vibetree JSON to Claude for LLM-based prompt refinement.
-    Returns a high-quality music generation prompt.
-    """
-    import httpx
+# Rate limits, overloads and gateway errors are worth retrying; other 4xx are not
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504, 529})
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_JITTER = 0.5
+
+# Finished prompts, keyed on model + system prompt + vibetree; oldest-used
+# entries are evicted past PROMPT_CACHE_MAX_ENTRIES
+PROMPT_CACHE_DIR = Path(
+    os.getenv("VIBETREE_PROMPT_CACHE", Path.home() / ".cache" / "vibetree_prompts")
+)
+PROMPT_CACHE_MAX_ENTRIES = 256
+
+# Section separators in main()'s report
+RULE = "=" * 80
+THIN_RULE = "-" * 80
+
+# VIBETREE_VERBOSE=1 also prints the example vibetree and what is sent to Claude
+VERBOSE = os.getenv("VIBETREE_VERBOSE") == "1"
 
-    system_prompt = """You are a music production expert specializing in creating detailed, 
+SYSTEM_PROMPT = """You are a music production expert specializing in creating detailed, 
 evocative prompts for music generation models. You will receive a structured "vibe tree" 
 that describes a musical concept with sections, moods, genres, instruments, and other attributes.
 
@@ -150,83 +163,279 @@ that:
 
 Return ONLY the final prompt text, no explanations or metadata."""
 
+# The constant part of every request body, left open for "messages"
+_REQUEST_PREFIX = orjson.dumps(
+    {
+        "model": CLAUDE_MODEL,
+        "max_tokens": 1024,
+        "stream": True,
+        "system": SYSTEM_PROMPT,
+    }
+)[:-1]
+
+# Prompt cache keys start from the model and system prompt, hashed once here
+_PROMPT_CACHE_HASHER = hashlib.blake2b(
+    orjson.dumps([CLAUDE_MODEL, SYSTEM_PROMPT]), digest_size=16
+)
+
+# The per-section fields passed on to Claude
+_SECTION_FIELDS = itemgetter("name", "weight", "branches")
+
+
+def vibetree_to_json(vibetree: dict) -> dict:
+    """Convert vibetree to JSON structure for LLM processing."""
+    root = vibetree["root"]
+    global_cfg = root["global"]
+    return {
+        "concept": root["concept"],
+        "image_interpretation": root.get("image_interpretation"),
+        "overall_arc": global_cfg.get("overall_arc"),
+        "duration_seconds": global_cfg.get("duration_seconds"),
+        "tags": global_cfg.get("tags", []),
+        "sections": [
+            {"name": name, "weight": weight, "branches": branches}
+            for name, weight, branches in map(_SECTION_FIELDS, root["sections"])
+        ],
+    }
+
+
+def _pretty_json(value) -> str:
+    """Two-space indented JSON, as embedded in the message to Claude."""
+    return orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+
+
+def _build_request(vibetree_json: dict, api_key: str) -> tuple[dict, bytes]:
+    """Return the headers and encoded JSON body of a Messages API call.
+
+    The body is serialized once, so retries resend the same bytes. Only the
+    user message is encoded per call; the rest comes from _REQUEST_PREFIX.
+    """
     user_message = f"""Create a music generation prompt from this vibe tree structure:
 
-{json.dumps(vibetree_json, indent=2)}"""
+{_pretty_json(vibetree_json)}"""
 
-    client = httpx.Client()
+    headers = {
+        "Content-Type": "application/json",
+        "x-api-key": api_key,
+        "anthropic-version": "2023-06-01",
+    }
+    body = b"".join(
+        (
+            _REQUEST_PREFIX,
+            b',"messages":[{"role":"user","content":',
+            orjson.dumps(user_message),
+            b"}]}",
+        )
+    )
+    return headers, body
+
+
+def _handle_event(line: str, parts: list[str]) -> bool:
+    """Apply one server-sent event line to ``parts``; True once the message ends."""
+    if not line.startswith("data:"):
+        return False
+    event = orjson.loads(line[5:])
+    kind = event.get("type")
+    if kind == "content_block_delta":
+        delta = event["delta"]
+        if delta.get("type") == "text_delta":
+            parts.append(delta["text"])
+    elif kind == "error":
+        raise Exception(f"Claude API error: {event['error'].get('message')}")
+    return kind == "message_stop"
+
+
+def _streamed_text(parts: list[str]) -> str:
+    """Join the streamed text deltas into the final prompt."""
+    text_content = "".join(parts).strip()
+    if not text_content:
+        raise Exception("No text content in Claude response")
+    return text_content
+
+
+def _raise_api_error(response: httpx.Response) -> None:
+    """Fail with the status and body of an unsuccessful API response."""
+    raise Exception(f"Claude API error: {response.status_code} {response.text}")
+
+
+def _retry_delay(attempt: int, response: httpx.Response | None = None) -> float:
+    """Backoff before retry ``attempt``: exponential with jitter, or Retry-After."""
+    delay = RETRY_BASE_DELAY * 2**attempt * (1 + random.uniform(0, RETRY_JITTER))
+    delay = min(delay, RETRY_MAX_DELAY)
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass  # HTTP-date form; keep the computed delay
+    return delay
 
+
+async def _call_claude_async(
+    client: httpx.AsyncClient,
+    headers: dict,
+    body: bytes,
+    max_retries: int = MAX_RETRIES,
+) -> str:
+    """Stream a Messages API call and return its text.
+
+    Text is collected as it arrives. Transient failures are retried with
+    backoff; any other error status raises straight away.
+    """
+    for attempt in range(max_retries + 1):
+        last = attempt == max_retries
+        try:
+            async with client.stream(
+                "POST", ANTHROPIC_MESSAGES_URL, headers=headers, content=body
+            ) as response:
+                if response.status_code == 200:
+                    parts: list[str] = []
+                    async for line in response.aiter_lines():
+                        if _handle_event(line, parts):
+                            break
+                    return _streamed_text(parts)
+                await response.aread()
+        except httpx.TransportError:
+            if last:
+                raise
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+        if last or response.status_code not in RETRYABLE_STATUS:
+            _raise_api_error(response)
+        await asyncio.sleep(_retry_delay(attempt, response))
+
+
+def _prompt_cache_key(vibetree_json: dict) -> str:
+    """Hash everything that determines Claude's answer into a cache key."""
+    hasher = _PROMPT_CACHE_HASHER.copy()
+    hasher.update(orjson.dumps(vibetree_json, option=orjson.OPT_SORT_KEYS))
+    return hasher.hexdigest()
+
+
+def _load_cached_prompt(cache_key: str) -> str | None:
+    """Return the cached prompt for ``cache_key``, or None on a miss."""
+    path = PROMPT_CACHE_DIR / f"{cache_key}.txt"
     try:
-        response = client.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-            },
-            json={
-                "model": "claude-3-5-sonnet-20241022",
-                "max_tokens": 1024,
-                "system": system_prompt,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": user_message,
-                    }
-                ],
-            },
+        prompt = path.read_text(encoding="utf-8")
+        os.utime(path)  # mark as recently used
+    except OSError:
+        return None
+    return prompt
+
+
+def _store_cached_prompt(cache_key: str, prompt: str) -> None:
+    """Cache a generated prompt, evicting the least recently used entries."""
+    try:
+        PROMPT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial entry
+        tmp = PROMPT_CACHE_DIR / f".{cache_key}.{os.getpid()}.tmp"
+        tmp.write_text(prompt, encoding="utf-8")
+        tmp.replace(PROMPT_CACHE_DIR / f"{cache_key}.txt")
+
+        entries = sorted(
+            PROMPT_CACHE_DIR.glob("*.txt"), key=lambda p: p.stat().st_mtime
         )
+        for stale in entries[: max(0, len(entries) - PROMPT_CACHE_MAX_ENTRIES)]:
+            stale.unlink(missing_ok=True)
+    except OSError as e:
+        log.warning("Could not cache prompt: %s", e)
+
+
+def generate_music_prompt_from_vibetree(vibetree_json: dict, api_key: str) -> str:
+    """
+    Send vibetree JSON to Claude for LLM-based prompt refinement.
+    Returns a high-quality music generation prompt.
+
+    Prompts are cached on disk, so an unchanged vibetree skips the API call.
+    """
+    [prompt] = _run(batch_generate([vibetree_json], api_key))
+    return prompt
+
+
+async def generate_music_prompt_from_vibetree_async(
+    vibetree_json: dict, api_key: str, client: httpx.AsyncClient, sem: asyncio.Semaphore
+) -> str:
+    """``generate_music_prompt_from_vibetree`` on a shared AsyncClient.
+
+    ``sem`` bounds how many requests are in flight at once.
+    """
+    cache_key = _prompt_cache_key(vibetree_json)
+    cached = _load_cached_prompt(cache_key)
+    if cached is not None:
+        return cached
 
-        if response.status_code != 200:
-            raise Exception(f"Claude API error: {response.status_code} {response.text}")
+    headers, body = _build_request(vibetree_json, api_key)
+    async with sem:
+        prompt = await _call_claude_async(client, headers, body)
+    _store_cached_prompt(cache_key, prompt)
+    return prompt
 
-        data = response.json()
-        text_content = next(
-            (c["text"] for c in data["content"] if c["type"] == "text"), None
+
+async def batch_generate(
+    vibetrees: list[dict], api_key: str, concurrency: int = 8
+) -> list[str]:
+    """Generate prompts for several vibetrees concurrently, in input order."""
+    async with httpx.AsyncClient(
+        http2=True, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS
+    ) as client:
+        sem = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(
+                generate_music_prompt_from_vibetree_async(v, api_key, client, sem)
+                for v in vibetrees
+            )
         )
 
-        if not text_content:
-            raise Exception("No text content in Claude response")
 
-        return text_content.strip()
+def _print_json(value) -> None:
+    """Write indented JSON straight to stdout's byte buffer."""
+    sys.stdout.flush()  # keep ordering with earlier log output
+    sys.stdout.buffer.write(
+        orjson.dumps(value, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    )
+
 
-    finally:
-        client.close()
+def _run(coro):
+    """``asyncio.run`` on uvloop when it is installed (it comes with uvicorn)."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+    return asyncio.run(coro, loop_factory=uvloop.new_event_loop)
 
 
 def main():
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
-        print("Error: ANTHROPIC_API_KEY environment variable not set")
+        log.error("Error: ANTHROPIC_API_KEY environment variable not set")
         sys.exit(1)
 
-    print("=" * 80)
-    print("VIBETREE TO MUSIC PROMPT TEST")
-    print("=" * 80)
+    log.info("%s\nVIBETREE TO MUSIC PROMPT TEST\n%s", RULE, RULE)
 
-    # Step 1: Show the vibetree structure
-    print("\n1. VIBETREE STRUCTURE:")
-    print("-" * 80)
-    print(json.dumps(EXAMPLE_VIBETREE, indent=2))
-
-    # Step 2: Convert to JSON
-    print("\n2. CONVERTED TO JSON (what goes to Claude):")
-    print("-" * 80)
     vibe_json = vibetree_to_json(EXAMPLE_VIBETREE)
-    print(json.dumps(vibe_json, indent=2))
+    if VERBOSE:
+        # Step 1: Show the vibetree structure
+        log.info("\n1. VIBETREE STRUCTURE:\n%s", THIN_RULE)
+        _print_json(EXAMPLE_VIBETREE)
+
+        # Step 2: Convert to JSON
+        log.info("\n2. CONVERTED TO JSON (what goes to Claude):\n%s", THIN_RULE)
+        _print_json(vibe_json)
 
     # Step 3: Generate prompt with Claude
-    print("\n3. CLAUDE-GENERATED MUSIC PROMPT:")
-    print("-" * 80)
+    log.info("\n3. CLAUDE-GENERATED MUSIC PROMPT:\n%s", THIN_RULE)
     try:
-        prompt = generate_music_prompt_from_vibetree(vibe_json, api_key)
-        print(prompt)
-        print("\n" + "=" * 80)
-        print("✓ Prompt generation successful!")
+        [prompt] = _run(batch_generate([vibe_json], api_key))
+        # The prompt is the script's output, so it is printed at any log level
+        print(prompt, flush=True)
+        log.info("\n%s\n✓ Prompt generation successful!", RULE)
     except Exception as e:
-        print(f"✗ Error: {e}")
+        log.error("✗ Error: %s", e)
         sys.exit(1)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv("LOGLEVEL", "INFO"), format="%(message)s", stream=sys.stdout
+    )
     main()
@@ -13,6 +13,7 @@ import { transformSongCharacteristicsToVibeTree } from "./utils/transform";
 import { createHistoryEntry, type HistoryEntry } from "./utils/history";
 import { diffTrees, type NodeDiff } from "./utils/treeDiff";
 import { flattenTree } from "./utils/flatten";
+import { waitForJob } from "./utils/jobStatus";
 import TreeStack from "./components/TreeStack";
 import type { TreeData } from "./components/TreeStack";
 import DetailPanel from "./components/DetailPanel";
@@ -221,49 +222,26 @@ function App() {
 
       const { job_id } = await generateRes.json();
 
-      // Step 2: Poll for completion
-      let completed = false;
-      let attempts = 0;
-      const maxAttempts = 600; // 10 minutes with 1s polls
-
-      while (!completed && attempts < maxAttempts) {
-        attempts++;
-        await new Promise((r) => setTimeout(r, 1000)); // Poll every 1 second
-
-        const statusRes = await fetch(
-          `${API_BASE}/api/status/${job_id}`
-        );
-        if (!statusRes.ok) {
-          throw new Error(`Status check failed: ${statusRes.status}`);
-        }
-
-        const job = await statusRes.json();
-
-        if (job.status === "completed") {
-          if (!job.result) {
-            throw new Error("No result returned from API");
-          }
-
-          // Transform SongCharacteristics to VibeTree
-          const vibeTree = transformSongCharacteristicsToVibeTree(job.result);
-          setTree(vibeTree);
-
-          // Populate visual trees
-           const vTrees = vibeTree.root.sections.map((s) =>
-             sectionToVisualTree(s)
-           );
-           setVisualTrees(vTrees);
-           setActiveSection(0);
-          setSelectedNodeId(null);
-          completed = true;
-        } else if (job.status === "failed") {
-          throw new Error(job.error || "Generation failed");
-        }
+      // Step 2: Wait for completion (pushed over WebSocket, polling fallback)
+      const job = await waitForJob(API_BASE, job_id, {
+        pollMs: 1000,
+        timeoutMs: 600_000,
+      });
+      if (!job.result) {
+        throw new Error("No result returned from API");
       }
 
-      if (!completed) {
-        throw new Error("Generation timeout");
-      }
+      // Transform SongCharacteristics to VibeTree
+      const vibeTree = transformSongCharacteristicsToVibeTree(job.result);
+      setTree(vibeTree);
+
+      // Populate visual trees
+      const vTrees = vibeTree.root.sections.map((s) =>
+        sectionToVisualTree(s)
+      );
+      setVisualTrees(vTrees);
+      setActiveSection(0);
+      setSelectedNodeId(null);
     } catch (error) {
       const message =
         error instanceof Error ? error.message : "Unknown error";
@@ -365,7 +343,11 @@ function App() {
     setMusicJobId(null);
     try {
       const formData = new FormData();
-      formData.append("vibe_tree", JSON.stringify(tree));
+      formData.append(
+        "vibe_tree",
+        new Blob([JSON.stringify(tree)], { type: "application/json" }),
+        "vibe_tree.json"
+      );
       formData.append("audio_duration", String(songDuration));
       if (audioFile) formData.append("reference_audio", audioFile);
 
@@ -376,57 +358,39 @@ function App() {
       if (!res.ok) throw new Error(`API error: ${res.status}`);
       const { job_id } = await res.json();
 
-      // Poll for completion
-      let completed = false;
-      let attempts = 0;
-      const maxAttempts = 600;
-
-      while (!completed && attempts < maxAttempts) {
-        attempts++;
-        await new Promise((r) => setTimeout(r, 2000));
-
-        const statusRes = await fetch(
-          `${API_BASE}/api/status/${job_id}`
-        );
-        if (!statusRes.ok) throw new Error(`Status check failed: ${statusRes.status}`);
-        const job = await statusRes.json();
-
-        if (job.status === "completed") {
-          if (!job.result) throw new Error("No result returned");
-          setMusicJobId(job_id);
-          setAudioUrl(`${API_BASE}${job.result.audio_url}`);
-          setMusicDescriptions(job.result.descriptions);
-
-          // Add to history after music generation completes
-          const flattenedPrompt = tree ? flattenTree(tree) : null;
-          const audioUrl = `${API_BASE}${job.result.audio_url}`;
-          const entry = createHistoryEntry(
-            prompt,
-            tree!,
-            visualTrees,
-            flattenedPrompt,
-            audioUrl,
-            job.result.descriptions
-          );
-          setHistory((prev) => [entry, ...prev]);
-          setCurrentHistoryId(entry.id);
-
-          // Compute diffs
-          const newDiffs = new Map<string, NodeDiff[]>();
-          visualTrees.forEach((vTree, i) => {
-            const prevTree = history.length > 0 ? history[0].visualTrees[i] : null;
-            const diff = diffTrees(vTree, prevTree || null);
-            newDiffs.set(vTree.id, [diff]);
-          });
-          setTreeDiffs(newDiffs);
-
-          completed = true;
-        } else if (job.status === "failed") {
-          throw new Error(job.error || "Music generation failed");
-        }
-      }
+      // Wait for completion (pushed over WebSocket, polling fallback)
+      const job = await waitForJob(API_BASE, job_id, {
+        pollMs: 2000,
+        timeoutMs: 1_200_000,
+      });
 
-      if (!completed) throw new Error("Music generation timed out");
+      if (!job.result) throw new Error("No result returned");
+      setMusicJobId(job_id);
+      setAudioUrl(`${API_BASE}${job.result.audio_url}`);
+      setMusicDescriptions(job.result.descriptions);
+
+      // Add to history after music generation completes
+      const flattenedPrompt = tree ? flattenTree(tree) : null;
+      const audioUrl = `${API_BASE}${job.result.audio_url}`;
+      const entry = createHistoryEntry(
+        prompt,
+        tree!,
+        visualTrees,
+        flattenedPrompt,
+        audioUrl,
+        job.result.descriptions
+      );
+      setHistory((prev) => [entry, ...prev]);
+      setCurrentHistoryId(entry.id);
+
+      // Compute diffs
+      const newDiffs = new Map<string, NodeDiff[]>();
+      visualTrees.forEach((vTree, i) => {
+        const prevTree = history.length > 0 ? history[0].visualTrees[i] : null;
+        const diff = diffTrees(vTree, prevTree || null);
+        newDiffs.set(vTree.id, [diff]);
+      });
+      setTreeDiffs(newDiffs);
     } catch (error) {
       const message = error instanceof Error ? error.message : "Unknown error";
       alert(`Music generation error: ${message}`);
@@ -0,0 +1,79 @@
+export interface JobStatus {
+  job_id: string;
+  status: "processing" | "completed" | "failed";
+  result: Record<string, any> | null;
+  error: string | null;
+}
+
+interface WaitOptions {
+  /** Poll interval used when the WebSocket is unavailable. */
+  pollMs: number;
+  /** Give up after this long. */
+  timeoutMs: number;
+}
+
+/** WebSocket URL for a job's status stream, relative to the API base. */
+function statusSocketUrl(apiBase: string, jobId: string): string {
+  const base = new URL(apiBase || window.location.origin, window.location.href);
+  base.protocol = base.protocol === "https:" ? "wss:" : "ws:";
+  base.pathname = `${base.pathname.replace(/\/$/, "")}/api/ws/status/${jobId}`;
+  return base.toString();
+}
+
+/**
+ * Resolve with the job once it completes; reject if it fails or times out.
+ *
+ * Status is pushed over `/api/ws/status/{id}`, so the server sends one
+ * message per state change. If the socket cannot be opened or drops before
+ * the job finishes (e.g. a proxy without WebSocket support), falls back to
+ * polling `/api/status/{id}` every `pollMs`.
+ */
+export async function waitForJob(
+  apiBase: string,
+  jobId: string,
+  { pollMs, timeoutMs }: WaitOptions
+): Promise<JobStatus> {
+  const deadline = Date.now() + timeoutMs;
+
+  const pushed = await new Promise<JobStatus | null>((resolve) => {
+    let socket: WebSocket;
+    try {
+      socket = new WebSocket(statusSocketUrl(apiBase, jobId));
+    } catch {
+      resolve(null);
+      return;
+    }
+    const timer = setTimeout(() => socket.close(), timeoutMs);
+    let settled = false;
+    const settle = (job: JobStatus | null) => {
+      if (settled) return;
+      settled = true;
+      clearTimeout(timer);
+      resolve(job);
+    };
+    socket.onmessage = (event) => {
+      const job: JobStatus = JSON.parse(event.data);
+      if (job.status !== "processing") {
+        settle(job);
+        socket.close();
+      }
+    };
+    socket.onerror = () => settle(null);
+    socket.onclose = () => settle(null);
+  });
+
+  let job = pushed;
+  while (!job && Date.now() < deadline) {
+    await new Promise((r) => setTimeout(r, pollMs));
+    const res = await fetch(`${apiBase}/api/status/${jobId}`);
+    if (!res.ok) {
+      throw new Error(`Status check failed: ${res.status}`);
+    }
+    const polled: JobStatus = await res.json();
+    if (polled.status !== "processing") job = polled;
+  }
+
+  if (!job) throw new Error("Generation timeout");
+  if (job.status === "failed") throw new Error(job.error || "Generation failed");
+  return job;
+}
@@ -9,97 +9,127 @@ export interface NodeDiff {
   childrenDiff?: NodeDiff[];
 }
 
+// Diffs by (current, previous) tree; entries go away with the trees
+const diffCache = new WeakMap<VisualNode, WeakMap<VisualNode, NodeDiff>>();
+
 /**
  * Compute differences between two trees.
  * Returns a diff tree that mirrors the current tree structure,
  * but tracks what changed compared to the previous tree.
+ *
+ * Edits copy only the path to the touched node (see mapChildren in
+ * visualTree.ts), so a subtree present by reference in both trees is
+ * identical. It gets a single "unchanged" entry with no childrenDiff;
+ * nodes missing from the diff are unchanged.
  */
 export function diffTrees(
   currentTree: VisualNode,
   previousTree: VisualNode | null
 ): NodeDiff {
-  if (!previousTree) {
-    // No previous tree, everything is added
-    return {
-      id: currentTree.id,
-      status: "added",
-      label: currentTree.label,
-      childrenDiff: currentTree.children.map((child) =>
-        diffTrees(child, null)
-      ),
-    };
-  }
+  if (!previousTree) return diffNode(currentTree, null);
 
-  // Find if this node exists in the previous tree (by id)
-  const findNodeById = (node: VisualNode, id: string): VisualNode | null => {
-    if (node.id === id) return node;
-    for (const child of node.children) {
-      const found = findNodeById(child, id);
-      if (found) return found;
-    }
-    return null;
-  };
+  // Trees are never mutated once built, so a diff between the same two
+  // objects stays valid (e.g. when flipping between history entries)
+  let cached = diffCache.get(currentTree);
+  if (!cached) {
+    cached = new WeakMap();
+    diffCache.set(currentTree, cached);
+  }
+  const hit = cached.get(previousTree);
+  if (hit) return hit;
 
+  // Only the root needs a full search; below it, nodes are matched
+  // against the children of their matched parent
   const prevNode = findNodeById(previousTree, currentTree.id);
+  const diff = diffNode(currentTree, prevNode);
+  cached.set(previousTree, diff);
+  return diff;
+}
 
+function findNodeById(node: VisualNode, id: string): VisualNode | null {
+  if (node.id === id) return node;
+  for (const child of node.children) {
+    const found = findNodeById(child, id);
+    if (found) return found;
+  }
+  return null;
+}
+
+function diffNode(
+  currentNode: VisualNode,
+  prevNode: VisualNode | null
+): NodeDiff {
   if (!prevNode) {
-    // Node is new
+    // Node is new, and so is everything under it
     return {
-      id: currentTree.id,
+      id: currentNode.id,
       status: "added",
-      label: currentTree.label,
-      childrenDiff: currentTree.children.map((child) =>
-        diffTrees(child, null)
-      ),
+      label: currentNode.label,
+      childrenDiff: currentNode.children.map((child) => diffNode(child, null)),
+    };
+  }
+
+  if (currentNode === prevNode) {
+    // Shared subtree: nothing below can differ, so don't descend
+    return {
+      id: currentNode.id,
+      status: "unchanged",
+      label: currentNode.label,
     };
   }
 
   // Node exists, check if it changed
-  const labelChanged = currentTree.label !== prevNode.label;
+  const labelChanged = currentNode.label !== prevNode.label;
   const status = labelChanged ? "changed" : "unchanged";
 
-  // Recursively diff children
-  const childrenDiff: NodeDiff[] = [];
+  // Index the previous children once rather than scanning them per child;
+  // the first child with a given id wins, as with Array.find
+  const prevChildren = new Map<string, VisualNode>();
+  for (const child of prevNode.children) {
+    if (!prevChildren.has(child.id)) prevChildren.set(child.id, child);
+  }
+  const currentIds = new Set(currentNode.children.map((c) => c.id));
 
   // Current children
-  for (const child of currentTree.children) {
-    const prevChild = prevNode.children.find((c) => c.id === child.id);
-    childrenDiff.push(diffTrees(child, prevChild || null));
-  }
+  const childrenDiff: NodeDiff[] = currentNode.children.map((child) =>
+    diffNode(child, prevChildren.get(child.id) ?? null)
+  );
 
   // Removed children (in prev but not in current)
   for (const prevChild of prevNode.children) {
-    if (!currentTree.children.find((c) => c.id === prevChild.id)) {
+    if (!currentIds.has(prevChild.id)) {
       childrenDiff.push({
         id: prevChild.id,
         status: "removed",
         label: prevChild.label,
-        childrenDiff: prevChild.children.map((child) =>
-          diffTrees(child, null)
-        ),
+        childrenDiff: prevChild.children.map((child) => diffNode(child, null)),
       });
     }
   }
 
   return {
-    id: currentTree.id,
+    id: currentNode.id,
     status,
-    label: currentTree.label,
-    childrenDiff:
-      childrenDiff.length > 0
-        ? childrenDiff
-        : currentTree.children.map((child) => diffTrees(child, null)),
+    label: currentNode.label,
+    childrenDiff,
   };
 }
 
 /**
- * Flatten a diff tree to get all nodes with their status
+ * Flatten a diff tree to get all nodes with their status (pre-order).
+ * Walks with an explicit stack, so deep trees neither recurse nor copy
+ * intermediate arrays.
  */
 export function flattenDiff(diff: NodeDiff): NodeDiff[] {
-  const result: NodeDiff[] = [diff];
-  if (diff.childrenDiff) {
-    for (const child of diff.childrenDiff) {
-      result.push(...flattenDiff(child));
+  const result: NodeDiff[] = [];
+  const stack: NodeDiff[] = [diff];
+  while (stack.length > 0) {
+    const node = stack.pop()!;
+    result.push(node);
+    const children = node.childrenDiff;
+    if (children) {
+      // Push in reverse so children are visited in order
+      for (let i = children.length - 1; i >= 0; i--) stack.push(children[i]);
     }
   }
   return result;
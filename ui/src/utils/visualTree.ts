@@ -293,8 +293,26 @@ function parseLabelToNameValue(label: string): { name: string; value: any } {
   return { name, value: valueStr };
 }
 
+/** Map `fn` over the children, returning `tree` itself if none changed. */
+function mapChildren(
+  tree: VisualNode,
+  fn: (child: VisualNode) => VisualNode
+): VisualNode {
+  let changed = false;
+  const children = tree.children.map((c) => {
+    const next = fn(c);
+    if (next !== c) changed = true;
+    return next;
+  });
+  return changed ? { ...tree, children } : tree;
+}
+
 /**
  * Immutable node operations for the visual tree.
+ *
+ * Operations are path-copying: only the nodes on the path to the edit are
+ * recreated and untouched subtrees are returned as-is, so consecutive
+ * snapshots (e.g. history entries) share all unchanged structure.
  */
 export function editVisualNode(
   tree: VisualNode,
@@ -302,19 +320,14 @@ export function editVisualNode(
   newLabel: string
 ): VisualNode {
   if (tree.id === id) return { ...tree, label: newLabel };
-  return {
-    ...tree,
-    children: tree.children.map((c) => editVisualNode(c, id, newLabel)),
-  };
+  return mapChildren(tree, (c) => editVisualNode(c, id, newLabel));
 }
 
 export function deleteVisualNode(tree: VisualNode, id: string): VisualNode {
-  return {
-    ...tree,
-    children: tree.children
-      .filter((c) => c.id !== id)
-      .map((c) => deleteVisualNode(c, id)),
-  };
+  const kept = tree.children.filter((c) => c.id !== id);
+  const pruned =
+    kept.length === tree.children.length ? tree : { ...tree, children: kept };
+  return mapChildren(pruned, (c) => deleteVisualNode(c, id));
 }
 
 export function addVisualChild(
@@ -330,8 +343,5 @@ export function addVisualChild(
       ],
     };
   }
-  return {
-    ...tree,
-    children: tree.children.map((c) => addVisualChild(c, parentId)),
-  };
+  return mapChildren(tree, (c) => addVisualChild(c, parentId));
 }